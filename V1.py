@@ -2,9 +2,9 @@ import pygame
 import random
 import math
 
-# Initialize Pygame
-pygame.init()
-pygame.font.init()
+from rendering import Compositor, draw_text
+import response
+from world import FixedTimestep, World, spawn_rng
 
 # Constants
 WIDTH, HEIGHT = 600, 600
@@ -17,12 +17,6 @@ GREEN = (0, 255, 0)
 RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 
-# Screen & Font
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Random Microbe Vehicle")
-font = pygame.font.SysFont("Arial", 20)
-clock = pygame.time.Clock()
-
 
 class Circle:
     def __init__(self, position, radius=50, color=WHITE):
@@ -35,13 +29,14 @@ class Circle:
 
 
 class Vehicle:
-    def __init__(self, position, radius=30, color=YELLOW):
+    def __init__(self, position, radius=30, color=YELLOW, rng=None):
         self.position = pygame.math.Vector2(position)
         self.radius = radius
         self.color = color
+        self.rng = rng if rng is not None else random.Random()
 
-        self.speed = random.uniform(1, 3)
-        self.direction = random.uniform(0, 360)
+        self.speed = self.rng.uniform(1, 3)
+        self.direction = self.rng.uniform(0, 360)
         self.sensor_radius = 10
         self.sensor_offset = self.radius + self.sensor_radius
         self.sensor_color = GREEN
@@ -65,15 +60,17 @@ class Vehicle:
     def check_sensor(self, objects):
         self.detected_object = None
         for obj in objects:
-            distance = self.sensor_position.distance_to(obj.position)
-            if distance < obj.radius + self.sensor_radius:
+            if response.contact(self.sensor_position, obj.position, obj.radius + self.sensor_radius):
                 self.detected_object = obj
                 return True
         return False
 
-    def move(self, objects):
+    def step(self, world, dt):
+        """Advance the vehicle by ``dt`` seconds; tuned per frame at ``FPS``."""
+        frames = dt * FPS
+
         # Check sensor first
-        self.check_sensor(objects)
+        self.check_sensor(world.obstacle_grid.nearby(self.sensor_position, self.sensor_radius))
         
         # If detecting something, avoid it
         if self.detected_object:
@@ -82,50 +79,81 @@ class Vehicle:
             self.direction = avoid_vector.angle_to(pygame.math.Vector2(1, 0))
         else:
             # Random movement if nothing detected
-            self.direction += random.uniform(-10, 10)
+            self.direction += self.rng.uniform(-10, 10) * frames
         
         self.direction %= 360
         
         direction_vector = pygame.math.Vector2(1, 0).rotate(self.direction)
-        self.position += direction_vector * self.speed
-        self.position.x %= WIDTH
-        self.position.y %= HEIGHT
+        self.position += direction_vector * self.speed * frames
+        world.wrap(self.position)
         
         self.update_sensor_position()
 
+    def state(self):
+        """``(x, y, heading, left_wheel, right_wheel, left_sensor, right_sensor)`` for recording.
+
+        ``direction`` is 0 to the right; the heading is turned to the shared
+        convention of 0 up, and the detector stands in for both sensors.
+        """
+        detected = 1.0 if self.detected_object else 0.0
+        return (self.position.x, self.position.y, self.direction + 90,
+                self.speed, self.speed, detected, detected)
+
+
+def create_world(seed=None):
+    rng = random.Random(seed)
+    sun = Circle((WIDTH // 2, HEIGHT // 2), radius=50, color=WHITE)
+    obstacles = [Circle((rng.randint(0, WIDTH), rng.randint(0, HEIGHT)), 
+                  radius=rng.randint(10, 30), 
+                  color=BLUE) for _ in range(5)]
+    vehicle = Vehicle((300, 500), radius=30, color=YELLOW, rng=spawn_rng(rng))
+    return World(WIDTH, HEIGHT, obstacles=[sun] + obstacles, vehicles=[vehicle], rng=rng)
 
-# Create objects
-sun = Circle((WIDTH // 2, HEIGHT // 2), radius=50, color=WHITE)
-obstacles = [Circle((random.randint(0, WIDTH), random.randint(0, HEIGHT)), 
-              radius=random.randint(10, 30), 
-              color=BLUE) for _ in range(5)]
-vehicle = Vehicle((300, 500), radius=30, color=YELLOW)
 
-# Game loop
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+def draw_background(surface, world):
+    surface.fill((0, 0, 0))
+    for obstacle in world.obstacles:
+        obstacle.draw(surface)
 
-    screen.fill((0, 0, 0))
 
-    # Update and draw objects
-    sun.draw(screen)
-    for obstacle in obstacles:
-        obstacle.draw(screen)
-    
-    vehicle.move([sun] + obstacles)
-    vehicle.draw(screen)
+def draw(surface, world, font):
+    for vehicle in world.vehicles:
+        vehicle.draw(surface)
 
     # Debug info
-    screen.blit(font.render(f"Direction: {vehicle.direction:.2f}", True, WHITE), (10, 10))
-    screen.blit(font.render(f"Detecting: {'Yes' if vehicle.detected_object else 'No'}", True, WHITE), (10, 40))
+    vehicle = world.vehicles[0]
+    draw_text(surface, font, f"Direction: {vehicle.direction:.2f}", WHITE, (10, 10), live=True)
+    draw_text(surface, font, f"Detecting: {'Yes' if vehicle.detected_object else 'No'}", WHITE, (10, 40))
+
+
+def main():
+    pygame.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Random Microbe Vehicle")
+    font = pygame.font.SysFont("Arial", 20)
+    clock = pygame.time.Clock()
+
+    world = create_world()
+    compositor = Compositor()
+    compositor.add_static(lambda surface: draw_background(surface, world))
+    compositor.add_dynamic(lambda surface: draw(surface, world, font))
+    scheduler = FixedTimestep(world, 1 / FPS)
+
+    # Game loop
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
 
-    pygame.display.flip()
-    clock.tick(FPS)
+        scheduler.advance(clock.tick(FPS) / 1000)
+        compositor.render(screen)
 
-pygame.quit()
+        pygame.display.flip()
 
+    pygame.quit()
 
 
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,12 @@ import pygame
 import math
 import random
 
-# Initialize Pygame
-pygame.init()
+from rendering import Compositor, draw_text, render_text
+import response
+from world import FixedTimestep, World, spawn_rng
 
 # Screen settings
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
-window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Braitenberg Vehicle 2b (Coward)")
 
 # Colors
 BG_COLOR = (0, 0, 0)         # Background color (black)
@@ -16,17 +15,16 @@ BOT_COLOR = (0, 255, 0)      # Bot color (green)
 DETECTOR_COLOR = (255, 0, 0) # Sensor color (red)
 LABEL_COLOR = (255, 255, 255) # Text color (white)
 
-# Fonts for debugging info
-font = pygame.font.SysFont("Arial", 18)
-
 # Settings
 FPS = 60
+LIGHT_RESPONSE = response.linear(400)  # 400 is light range
 
 # Braitenberg Vehicle 2b (Coward) class
 class BraitenbergVehicle:
-    def __init__(self, position, heading):
+    def __init__(self, position, heading, rng=None):
         self.position = pygame.Vector2(position)
         self.heading = heading
+        self.rng = rng if rng is not None else random.Random()
         self.body_size = 10
         self.detector_size = 5
         self.sensor_distance = 30
@@ -35,6 +33,14 @@ class BraitenbergVehicle:
         self.left_eye = pygame.Vector2()
         self.right_eye = pygame.Vector2()
 
+        # Last step's signals, kept for telemetry
+        self.left_intensity = 0
+        self.right_intensity = 0
+        self.left_motor = 0
+        self.right_motor = 0
+        self.turn = 0
+        self.motor_speed = 0
+
     def update_sensors(self):
         forward = pygame.Vector2(0, -1).rotate(self.heading)
         left = forward.rotate(90)
@@ -44,66 +50,68 @@ class BraitenbergVehicle:
 
     def get_light_intensity(self, sensor_pos, light_pos):
         """Calculate the light intensity based on distance from light source."""
-        distance = sensor_pos.distance_to(light_pos)
         # Simple inverse linear drop-off
-        intensity = max(0, 1 - (distance / 400))  # 400 is light range
-        return intensity
+        return LIGHT_RESPONSE.between(sensor_pos, light_pos)
 
-    def navigate(self, target_pos, surface):
+    def step(self, world, dt):
+        """Advance the vehicle by ``dt`` seconds; tuned per frame at ``FPS``."""
+        frames = dt * FPS
         self.update_sensors()
 
         # Get the light intensity from both sensors
-        left_intensity = self.get_light_intensity(self.left_eye, target_pos)
-        right_intensity = self.get_light_intensity(self.right_eye, target_pos)
+        self.left_intensity = sum(self.get_light_intensity(self.left_eye, light.location) for light in world.lights)
+        self.right_intensity = sum(self.get_light_intensity(self.right_eye, light.location) for light in world.lights)
 
         # Vehicle 2b (Coward) behavior:
         # Crossed connections: left sensor controls right motor, right sensor controls left motor
-        left_motor = right_intensity  # Right sensor controls left motor
-        right_motor = left_intensity  # Left sensor controls right motor
+        self.left_motor = self.right_intensity  # Right sensor controls left motor
+        self.right_motor = self.left_intensity  # Left sensor controls right motor
         
         # Calculate turn based on motor difference
-        turn = (right_motor - left_motor) * 3.0  # Increased turn sensitivity
+        turn = (self.right_motor - self.left_motor) * 3.0  # Increased turn sensitivity
         
         # Add random wandering
         random_wander_strength = 1.5  # Degrees per frame
-        turn += random.uniform(-random_wander_strength, random_wander_strength)
+        turn += self.rng.uniform(-random_wander_strength, random_wander_strength)
+        self.turn = turn
         
         # Apply turn to heading
-        self.heading += turn
+        self.heading += turn * frames
         
         # Base speed is average of both motors
-        motor_speed = (left_motor + right_motor) / 2
-        motor_speed = max(0.1, motor_speed)  # Ensure minimum movement
+        motor_speed = (self.left_motor + self.right_motor) / 2
+        self.motor_speed = max(0.1, motor_speed)  # Ensure minimum movement
 
         # Move forward
         forward = pygame.Vector2(0, -1).rotate(self.heading)
-        movement = forward * motor_speed * 2.0  # Speed scale
-        self.position += movement
+        movement = forward * self.motor_speed * 2.0  # Speed scale
+        self.position += movement * frames
 
         # Wrap around screen
-        self.position.x %= SCREEN_WIDTH
-        self.position.y %= SCREEN_HEIGHT
-
-        # Debug telemetry
-        telemetry = [
-            f"L-Sensor: {left_intensity:.2f}",
-            f"R-Sensor: {right_intensity:.2f}",
-            f"L-Motor: {left_motor:.2f}",
-            f"R-Motor: {right_motor:.2f}",
-            f"Turn: {turn:.2f}°",
-            f"Speed: {motor_speed * 2.0:.2f}",
+        world.wrap(self.position)
+
+    def state(self):
+        """``(x, y, heading, left_wheel, right_wheel, left_sensor, right_sensor)`` for recording."""
+        return (self.position.x, self.position.y, self.heading,
+                self.left_motor, self.right_motor, self.left_intensity, self.right_intensity)
+
+    def telemetry(self):
+        return [
+            f"L-Sensor: {self.left_intensity:.2f}",
+            f"R-Sensor: {self.right_intensity:.2f}",
+            f"L-Motor: {self.left_motor:.2f}",
+            f"R-Motor: {self.right_motor:.2f}",
+            f"Turn: {self.turn:.2f}°",
+            f"Speed: {self.motor_speed * 2.0:.2f}",
             f"Heading: {self.heading:.2f}°"
         ]
-        for i, line in enumerate(telemetry):
-            debug = font.render(line, True, LABEL_COLOR)
-            surface.blit(debug, (10, 10 + i * 20))
 
-    def render(self, surface):
+    def render(self, surface, font):
         pygame.draw.circle(surface, BOT_COLOR, (int(self.position.x), int(self.position.y)), self.body_size)
         pygame.draw.circle(surface, DETECTOR_COLOR, (int(self.left_eye.x), int(self.left_eye.y)), self.detector_size)
         pygame.draw.circle(surface, DETECTOR_COLOR, (int(self.right_eye.x), int(self.right_eye.y)), self.detector_size)
 
-        tag = font.render("Braitenberg Vehicle 2b: Coward", True, LABEL_COLOR)
+        tag = render_text(font, "Braitenberg Vehicle 2b: Coward", LABEL_COLOR)
         tag_rect = tag.get_rect(center=(self.position.x, self.position.y - 25))
         surface.blit(tag, tag_rect)
 
@@ -115,37 +123,54 @@ class GlowTarget:
     def render(self, surface):
         pygame.draw.circle(surface, (255, 255, 0), (int(self.location.x), int(self.location.y)), 15)
 
-# --- Initialization ---
-bot = BraitenbergVehicle((SCREEN_WIDTH - 80, SCREEN_HEIGHT - 80), -135)
-beacon = GlowTarget((SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-
-# --- Main Loop ---
-clock = pygame.time.Clock()
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    window.fill(BG_COLOR)
-    beacon.render(window)
-    bot.navigate(beacon.location, window)
-    bot.render(window)
-
-    pygame.display.flip()
-    clock.tick(FPS)
-
-pygame.quit()
-
-
+def draw_telemetry(surface, font, lines):
+    for i, line in enumerate(lines):
+        draw_text(surface, font, line, LABEL_COLOR, (10, 10 + i * 20), live=True)
 
+def create_world(seed=None):
+    rng = random.Random(seed)
+    bot = BraitenbergVehicle((SCREEN_WIDTH - 80, SCREEN_HEIGHT - 80), -135, rng=spawn_rng(rng))
+    beacon = GlowTarget((SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+    return World(SCREEN_WIDTH, SCREEN_HEIGHT, lights=[beacon], vehicles=[bot], rng=rng)
 
+def draw_background(surface, world):
+    surface.fill(BG_COLOR)
+    for beacon in world.lights:
+        beacon.render(surface)
 
+def draw(surface, world, font):
+    for bot in world.vehicles:
+        draw_telemetry(surface, font, bot.telemetry())
+        bot.render(surface, font)
 
+# --- Main Loop ---
+def main():
+    pygame.init()
+    window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Braitenberg Vehicle 2b (Coward)")
 
+    # Fonts for debugging info
+    font = pygame.font.SysFont("Arial", 18)
 
+    world = create_world()
+    compositor = Compositor()
+    compositor.add_static(lambda surface: draw_background(surface, world))
+    compositor.add_dynamic(lambda surface: draw(surface, world, font))
 
+    clock = pygame.time.Clock()
+    scheduler = FixedTimestep(world, 1 / FPS)
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
 
+        scheduler.advance(clock.tick(FPS) / 1000)
+        compositor.render(window)
 
+        pygame.display.flip()
 
+    pygame.quit()
 
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,13 @@ import pygame
 import math
 import random
 
-# Initialize Pygame
-pygame.init()
+from light_field import LightField
+from rendering import Compositor, blit_centered, draw_text, render_text, sprites
+import response
+from world import FixedTimestep, World, spawn_rng
 
 # Screen settings
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
-window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Braitenberg Vehicle 4 with Obstacle Avoidance")
 
 # Colors
 BG_COLOR = (0, 0, 0)
@@ -18,9 +18,6 @@ OBSTACLE_COLOR = (100, 100, 100)
 LABEL_COLOR = (255, 255, 255)
 BUMPER_COLOR = (0, 255, 0)  # Green for bumper sensors
 
-# Font
-font = pygame.font.SysFont("Arial", 18)
-
 # Settings
 FPS = 60
 MAX_SPEED = 3.0
@@ -37,11 +34,16 @@ class Obstacle:
     def render(self, surface):
         pygame.draw.circle(surface, OBSTACLE_COLOR, (int(self.position.x), int(self.position.y)), self.radius)
 
+def light_falloff(distance_sq):
+    """``get_light_intensity`` over an array of squared distances, for the light field."""
+    return response.linear(VISION_RANGE).many(distance_sq)
+
 # Braitenberg Vehicle 4 with crossed inhibitory connections
 class BraitenbergVehicle4:
-    def __init__(self, position, heading):
+    def __init__(self, position, heading, rng=None):
         self.position = pygame.Vector2(position)
         self.heading = heading
+        self.rng = rng if rng is not None else random.Random()
         self.body_size = 10
         self.detector_size = 5
         self.sensor_distance = 30
@@ -58,6 +60,13 @@ class BraitenbergVehicle4:
         self.left_wheel_speed = 0
         self.right_wheel_speed = 0
 
+        # Last step's signals, kept for telemetry
+        self.left_sensor = 0
+        self.right_sensor = 0
+        self.left_repulsion = 0
+        self.right_repulsion = 0
+        self.speed = 0
+
     def update_sensors(self):
         forward = pygame.Vector2(0, -1).rotate(self.heading)
         left = forward.rotate(90)
@@ -72,11 +81,8 @@ class BraitenbergVehicle4:
         self.right_bumper = self.position + forward * self.bumper_distance + right * self.bumper_gap
 
     def get_light_intensity(self, sensor_pos, light_pos):
-        distance = sensor_pos.distance_to(light_pos)
-        if distance > VISION_RANGE:
-            return 0  # Beyond vision range
-        intensity = max(0, 1 - (distance / VISION_RANGE))  # Fall-off within vision range
-        return intensity
+        # Fall-off within vision range, zero beyond; looked up each call so sweeps can change VISION_RANGE
+        return response.linear(VISION_RANGE).between(sensor_pos, light_pos)
 
     def get_obstacle_repulsion(self, sensor_pos, obstacle):
         distance = sensor_pos.distance_to(obstacle.position) - obstacle.radius
@@ -88,16 +94,25 @@ class BraitenbergVehicle4:
             return 1.0  # Maximum repulsion when touching
         return (OBSTACLE_THRESHOLD - distance) / OBSTACLE_THRESHOLD
 
-    def navigate(self, light_sources, obstacles, surface):
+    def step(self, world, dt):
+        """Advance the vehicle by ``dt`` seconds; tuned per frame at ``FPS``."""
+        frames = dt * FPS
         self.update_sensors()
 
         # Sum light intensities from all sources within vision range
-        left_sensor = sum(self.get_light_intensity(self.left_eye, light.location) for light in light_sources)
-        right_sensor = sum(self.get_light_intensity(self.right_eye, light.location) for light in light_sources)
-
-        # Sum obstacle repulsions
-        left_repulsion = sum(self.get_obstacle_repulsion(self.left_bumper, obs) for obs in obstacles)
-        right_repulsion = sum(self.get_obstacle_repulsion(self.right_bumper, obs) for obs in obstacles)
+        if world.light_field is not None:
+            left_sensor = world.light_field.sample(self.left_eye)
+            right_sensor = world.light_field.sample(self.right_eye)
+        else:
+            left_sensor = sum(self.get_light_intensity(self.left_eye, light.location) for light in world.lights)
+            right_sensor = sum(self.get_light_intensity(self.right_eye, light.location) for light in world.lights)
+
+        # Sum obstacle repulsions, only over obstacles in range of each bumper
+        grid = world.obstacle_grid
+        left_repulsion = sum(self.get_obstacle_repulsion(self.left_bumper, obs)
+                             for obs in grid.nearby(self.left_bumper, OBSTACLE_THRESHOLD))
+        right_repulsion = sum(self.get_obstacle_repulsion(self.right_bumper, obs)
+                              for obs in grid.nearby(self.right_bumper, OBSTACLE_THRESHOLD))
 
         # Crossed inhibitory connections for lights
         max_signal = 1.0
@@ -118,40 +133,47 @@ class BraitenbergVehicle4:
 
         # Add slight random perturbation
         random_wander_strength = 0.5
-        self.heading += random.uniform(-random_wander_strength, random_wander_strength)
+        self.heading += self.rng.uniform(-random_wander_strength, random_wander_strength) * frames
 
         # Turning
         turn_rate = (right_wheel - left_wheel) * 10
-        self.heading += turn_rate
+        self.heading += turn_rate * frames
 
         # Forward movement with speed limit
         speed = min(MAX_SPEED, (left_wheel + right_wheel) / 2)
         speed = max(0.1, speed)  # Minimum speed
         movement = pygame.Vector2(0, -1).rotate(self.heading) * speed * 2.0
-        self.position += movement
+        self.position += movement * frames
 
         # Wrap screen
-        self.position.x %= SCREEN_WIDTH
-        self.position.y %= SCREEN_HEIGHT
-
-        # Info
-        telemetry = [
-            f"Left Sensor: {left_sensor:.2f}, inhibits Right Wheel",
-            f"Right Sensor: {right_sensor:.2f}, inhibits Left Wheel",
-            f"Left Repulsion: {left_repulsion:.2f}",
-            f"Right Repulsion: {right_repulsion:.2f}",
-            f"Left Wheel Speed: {left_wheel:.2f}",
-            f"Right Wheel Speed: {right_wheel:.2f}",
+        world.wrap(self.position)
+
+        self.left_sensor = left_sensor
+        self.right_sensor = right_sensor
+        self.left_repulsion = left_repulsion
+        self.right_repulsion = right_repulsion
+        self.speed = speed
+
+    def state(self):
+        """``(x, y, heading, left_wheel, right_wheel, left_sensor, right_sensor)`` for recording."""
+        return (self.position.x, self.position.y, self.heading,
+                self.left_wheel_speed, self.right_wheel_speed, self.left_sensor, self.right_sensor)
+
+    def telemetry(self):
+        return [
+            f"Left Sensor: {self.left_sensor:.2f}, inhibits Right Wheel",
+            f"Right Sensor: {self.right_sensor:.2f}, inhibits Left Wheel",
+            f"Left Repulsion: {self.left_repulsion:.2f}",
+            f"Right Repulsion: {self.right_repulsion:.2f}",
+            f"Left Wheel Speed: {self.left_wheel_speed:.2f}",
+            f"Right Wheel Speed: {self.right_wheel_speed:.2f}",
             f"Heading: {self.heading:.2f}",
-            f"Speed: {speed * 2.0:.2f}",
+            f"Speed: {self.speed * 2.0:.2f}",
             f"Vision Range: {VISION_RANGE}",
             f"Max Speed: {MAX_SPEED}"
         ]
-        for i, line in enumerate(telemetry):
-            debug = font.render(line, True, LABEL_COLOR)
-            surface.blit(debug, (10, 10 + i * 20))
 
-    def render(self, surface):
+    def render(self, surface, font):
         # Draw body
         pygame.draw.circle(surface, BOT_COLOR, (int(self.position.x), int(self.position.y)), self.body_size)
 
@@ -178,14 +200,12 @@ class BraitenbergVehicle4:
         pygame.draw.circle(surface, (rw_intensity, rw_intensity, rw_intensity), (int(right_wheel_pos.x), int(right_wheel_pos.y)), 5)
 
         # Label
-        tag = font.render("Braitenberg Vehicle 4 with Obstacle Avoidance", True, LABEL_COLOR)
+        tag = render_text(font, "Braitenberg Vehicle 4 with Obstacle Avoidance", LABEL_COLOR)
         tag_rect = tag.get_rect(center=(self.position.x, self.position.y - 20))
         surface.blit(tag, tag_rect)
 
         # Draw vision range (semi-transparent circle)
-        vision_surface = pygame.Surface((VISION_RANGE*2, VISION_RANGE*2), pygame.SRCALPHA)
-        pygame.draw.circle(vision_surface, (50, 50, 150, 50), (VISION_RANGE, VISION_RANGE), VISION_RANGE)
-        surface.blit(vision_surface, (self.position.x - VISION_RANGE, self.position.y - VISION_RANGE))
+        blit_centered(surface, sprites.circle(VISION_RANGE, (50, 50, 150, 50)), self.position)
 
 # GlowTarget class (light source)
 class GlowTarget:
@@ -195,52 +215,76 @@ class GlowTarget:
     def render(self, surface):
         pygame.draw.circle(surface, (255, 255, 0), (int(self.location.x), int(self.location.y)), 15)
         # Draw light radius indicator
-        light_radius_surface = pygame.Surface((VISION_RANGE*2, VISION_RANGE*2), pygame.SRCALPHA)
-        pygame.draw.circle(light_radius_surface, (255, 255, 0, 20), (VISION_RANGE, VISION_RANGE), VISION_RANGE)
-        surface.blit(light_radius_surface, (self.location.x - VISION_RANGE, self.location.y - VISION_RANGE))
-
-# Initialization
-bot = BraitenbergVehicle4((SCREEN_WIDTH - 80, SCREEN_HEIGHT - 80), -135)
-light_sources = [
-    GlowTarget((150, 150)),
-    GlowTarget((650, 450))
-]
-
-# Create obstacles
-obstacles = [
-    Obstacle((400, 300), 40),
-    Obstacle((200, 400), 35),
-    Obstacle((600, 200), 45),
-    Obstacle((300, 500), 30)
-]
+        blit_centered(surface, sprites.circle(VISION_RANGE, (255, 255, 0, 20)), self.location)
 
-# Main Loop
-clock = pygame.time.Clock()
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+def draw_telemetry(surface, font, lines):
+    for i, line in enumerate(lines):
+        draw_text(surface, font, line, LABEL_COLOR, (10, 10 + i * 20), live=True)
 
-    window.fill(BG_COLOR)
+def draw_background(surface, world):
+    surface.fill(BG_COLOR)
 
     # Render all lights
-    for light in light_sources:
-        light.render(window)
+    for light in world.lights:
+        light.render(surface)
     
     # Render all obstacles
-    for obstacle in obstacles:
-        obstacle.render(window)
-
-    # Navigate and render bot
-    bot.navigate(light_sources, obstacles, window)
-    bot.render(window)
-
-    pygame.display.flip()
-    clock.tick(FPS)
-
-pygame.quit()
-
+    for obstacle in world.obstacles:
+        obstacle.render(surface)
 
+def draw(surface, world, font):
+    # Render bot
+    for bot in world.vehicles:
+        draw_telemetry(surface, font, bot.telemetry())
+        bot.render(surface, font)
 
+# Initialization
+def create_world(seed=None, light_field=True):
+    rng = random.Random(seed)
+    bot = BraitenbergVehicle4((SCREEN_WIDTH - 80, SCREEN_HEIGHT - 80), -135, rng=spawn_rng(rng))
+    light_sources = [
+        GlowTarget((150, 150)),
+        GlowTarget((650, 450))
+    ]
+
+    # Create obstacles
+    obstacles = [
+        Obstacle((400, 300), 40),
+        Obstacle((200, 400), 35),
+        Obstacle((600, 200), 45),
+        Obstacle((300, 500), 30)
+    ]
+    # The lights never move, so their summed intensity is sampled from a grid
+    field = LightField(SCREEN_WIDTH, SCREEN_HEIGHT, light_falloff) if light_field else None
+    return World(SCREEN_WIDTH, SCREEN_HEIGHT, lights=light_sources, obstacles=obstacles, vehicles=[bot], rng=rng,
+                 light_field=field)
 
+# Main Loop
+def main():
+    pygame.init()
+    window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Braitenberg Vehicle 4 with Obstacle Avoidance")
+    font = pygame.font.SysFont("Arial", 18)
+
+    world = create_world()
+    compositor = Compositor()
+    compositor.add_static(lambda surface: draw_background(surface, world))
+    compositor.add_dynamic(lambda surface: draw(surface, world, font))
+
+    clock = pygame.time.Clock()
+    scheduler = FixedTimestep(world, 1 / FPS)
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+        scheduler.advance(clock.tick(FPS) / 1000)
+        compositor.render(window)
+
+        pygame.display.flip()
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,25 @@
 import pygame
+import argparse
 import math
 import random
 import time
 from collections import deque
 
-# Initialize Pygame
-pygame.init()
+import numpy as np
+
+from camera import Camera
+from collision_memory import CollisionMemory, SharedCollisionMemory
+from light_field import LightField
+from profiler import profiler
+from raycast import batch_raycast, ray_directions
+from rendering import Compositor, DetailLevel, DirtyRegions, MemoryHeatmap, draw_points, draw_text, render_text
+import response
+from spatial import NeighborGrid
+from trails import TrailBuffer
+from world import FixedTimestep, World, spawn_rng
 
 # Screen settings
 SCREEN_WIDTH, SCREEN_HEIGHT = 1000, 800
-window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Enhanced Braitenberg Vehicle 6")
 
 # Colors
 BG_COLOR = (10, 10, 25)
@@ -23,15 +32,18 @@ LIGHT_COLOR = (255, 255, 150)
 PATH_COLOR = (100, 200, 255, 100)
 MEMORY_COLOR = (255, 50, 50, 150)
 
-# Font
-font = pygame.font.SysFont("Arial", 16)
-title_font = pygame.font.SysFont("Arial", 24, bold=True)
-
 # Settings
 FPS = 90
 GRID_SIZE = 40  # Size of grid cells for memory map
 COLLISION_DECAY = 0.98  # Faster decay for collision memory
 MEMORY_SHARING_DISTANCE = 200
+LIGHT_RESPONSE = response.power(500, 1.5)  # Non-linear falloff
+RAY_ANGLES = list(range(0, 360, 45))  # Avoidance ray fan, degrees from heading 0
+RAY_LENGTH = 100
+RAY_DIRECTIONS = ray_directions(RAY_ANGLES)
+RAY_BATCH_LIMIT = 64  # Above this many obstacles, each bot is only cast against the grid cells its rays reach
+CULL_MARGIN = RAY_LENGTH + 30  # How far outside the view a bot's rays and tag can still show
+TELEMETRY_BOTS = 4  # Telemetry panels that fit down the right of the screen
 
 # Static obstacles
 static_obstacles = [
@@ -43,20 +55,124 @@ static_obstacles = [
     pygame.Rect(750, 500, 150, 80)
 ]
 
-# Collision memory grid (threshold map)
-collision_map = [[0 for _ in range(SCREEN_WIDTH // GRID_SIZE)] for _ in range(SCREEN_HEIGHT // GRID_SIZE)]
-last_update_time = time.time()
+class MemoryWorld(World):
+    """World with the collision memory grid (threshold map) the bots share."""
+
+    def __init__(self, width, height, lights=(), obstacles=(), vehicles=(), rng=None, light_field=None):
+        super().__init__(width, height, lights, obstacles, vehicles, rng, light_field)
+        self.neighbors = None  # Cell list of the bots as of the last step
+        self.reset_memory()
+
+    def reset_memory(self):
+        if hasattr(self, "collision_map"):
+            self.collision_map.reset()
+        else:
+            self.collision_map = CollisionMemory(self.width // GRID_SIZE, self.height // GRID_SIZE, GRID_SIZE)
+
+    def step(self, dt):
+        self.move(dt)
+        self.share()
+
+    def move(self, dt):
+        """Decay the memory, then cast every bot's rays and step it."""
+        # Update collision memory decay
+        t = profiler.start()
+        self.collision_map.decay(COLLISION_DECAY ** (dt * FPS))
+        t = profiler.stop("decay", t)
+
+        # Bots only raycast static obstacles from where they start the step,
+        # so the whole fan for every bot can be cast up front in one batch
+        distances, points, normals = cast_rays(self.vehicles, self.obstacle_grid)
+        for i, vehicle in enumerate(self.vehicles):
+            vehicle.ray_hits = (distances[i], points[i], normals[i])
+        profiler.stop("raycast", t)
+        super().step(dt)
+
+    def share(self, halo=None):
+        """Share memory between nearby bots and update how afraid each is.
+
+        ``halo`` holds the (K, 2) positions of bots another shard owns (see
+        ``sharding.py``); they share into this world's bots but not back.
+        """
+        t = profiler.start()
+        positions = self.positions()
+        if halo is None:
+            self.neighbors = neighbors = NeighborGrid(positions, MEMORY_SHARING_DISTANCE)
+        else:
+            self.neighbors = None
+            neighbors = NeighborGrid(np.concatenate((positions, halo)), MEMORY_SHARING_DISTANCE)
+        share_memory(self.vehicles, self.collision_map, neighbors, halo)
+
+        # Dynamic color based on fear level
+        for vehicle in self.vehicles:
+            avoidance_value = vehicle.check_avoidance_zone(self.collision_map)
+            vehicle.fear_level = min(1.0, avoidance_value / 5.0)
+        profiler.stop("share_memory", t)
+
+    def positions(self):
+        return np.array([(bot.position.x, bot.position.y) for bot in self.vehicles]).reshape(-1, 2)
+
+    def vehicles_in(self, left, top, right, bottom):
+        """Bots inside a world box, e.g. the camera's view, in list order."""
+        if self.neighbors is None or len(self.neighbors.points) != len(self.vehicles):
+            self.neighbors = NeighborGrid(self.positions(), MEMORY_SHARING_DISTANCE)
+        return [self.vehicles[i] for i in self.neighbors.in_box(left, top, right, bottom)]
+
+def cast_rays(bots, obstacle_grid):
+    """Cast every bot's avoidance fan against the rects in ``obstacle_grid``."""
+    origins = np.array([(bot.position.x, bot.position.y) for bot in bots], dtype=np.float64).reshape(-1, 2)
+    if len(obstacle_grid) <= RAY_BATCH_LIMIT:
+        return batch_raycast(origins, RAY_DIRECTIONS, RAY_LENGTH, obstacle_grid.boxes)
+
+    # Each bot's nearby rects, padded with a box at infinity, still cast in one batch
+    nearby = obstacle_grid.candidates_around(origins, RAY_LENGTH)
+    boxes = np.concatenate((obstacle_grid.boxes, np.full((1, 4), np.inf)))
+    return batch_raycast(origins, RAY_DIRECTIONS, RAY_LENGTH, boxes[nearby])
+
+def share_memory(bots, collision_map, neighbors=None, halo=None):
+    """Share collision memory between all bots within MEMORY_SHARING_DISTANCE.
+
+    Neighbours come from one cell-list query for the whole swarm (pass a
+    ``NeighborGrid`` of the bots' positions to reuse one). Every
+    bot's cell then moves halfway towards the mean of its neighbours' cells
+    in one batch, which for a lone pair is the plain average they used to
+    swap. Bots standing in the same cell write the mean of their results.
+
+    ``halo`` adds (K, 2) positions of read-only bots: they count as
+    neighbours, but their cells are not written (``neighbors`` must then
+    cover ``bots`` followed by the halo).
+    """
+    positions = np.array([(bot.position.x, bot.position.y) for bot in bots]).reshape(-1, 2)
+    owned = len(positions)
+    if halo is not None:
+        positions = np.concatenate((positions, np.asarray(halo, dtype=np.float64).reshape(-1, 2)))
+    cells, on_grid = collision_map.cells_of(positions)
+    if neighbors is None:
+        neighbors = NeighborGrid(positions, MEMORY_SHARING_DISTANCE)
+    mine, theirs = neighbors.pairs()
+    keep = on_grid[mine] & on_grid[theirs]
+    mine, theirs = mine[keep], theirs[keep]
+    if len(mine) == 0:
+        return
 
-# Create a surface for the memory grid visualization
-memory_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+    values = collision_map.gather(cells)
+    neighbour_count = np.bincount(mine, minlength=len(positions))
+    neighbour_sum = np.bincount(mine, weights=values[theirs], minlength=len(positions))
+    sharing = neighbour_count > 0
+    sharing[owned:] = False
+    averaged = (values[sharing] + neighbour_sum[sharing] / neighbour_count[sharing]) * 0.5
+
+    targets, slot = np.unique(cells[sharing], return_inverse=True)
+    collision_map.scatter(targets, np.bincount(slot, weights=averaged) / np.bincount(slot))
 
 # Braitenberg Vehicle 6
 class BraitenbergVehicle6:
-    def __init__(self, position, heading, name, index):
+    def __init__(self, position, heading, name, index, rng=None):
         self.name = name
         self.index = index
         self.position = pygame.Vector2(position)
         self.heading = heading
+        self.rng = rng if rng is not None else random.Random()
         self.target_heading = heading
         self.velocity = pygame.Vector2(0, 0)
         self.acceleration = 0.5
@@ -77,12 +193,21 @@ class BraitenbergVehicle6:
         self.left_wheel_speed = 0
         self.right_wheel_speed = 0
         
-        self.path = deque(maxlen=100)  # Store recent positions for path drawing
+        self.path = TrailBuffer(100)  # Store recent positions for path drawing
         self.collision_count = 0
-        self.last_collision_time = 0
+        self.last_collision_time = -math.inf  # Simulation time of the last collision
         self.avoidance_vector = pygame.Vector2(0, 0)
         self.avoidance_strength = 0
         self.raycast_points = []
+        self.ray_hits = None  # (distances, points, normals) cast ahead by the world
+
+        # Last step's signals, kept for telemetry and rendering
+        self.current_left = 0
+        self.current_right = 0
+        self.delta_left = 0
+        self.delta_right = 0
+        self.speed = 0
+        self.fear_level = 0
 
     def update_sensors(self):
         forward = pygame.Vector2(0, -1).rotate(self.heading)
@@ -92,129 +217,57 @@ class BraitenbergVehicle6:
         self.right_eye = self.position + forward * self.sensor_distance + right * self.sensor_gap
 
     def get_light_intensity(self, sensor_pos, light_pos):
-        distance = sensor_pos.distance_to(light_pos)
-        return max(0, 1 - (distance / 500) ** 1.5)  # Non-linear falloff
-
-    def raycast(self, start, end, obstacles):
-        """Cast a ray from start to end and return collision point if any"""
-        direction = (end - start)
-        max_distance = direction.length()
-        direction.normalize_ip()
-        
-        closest_t = float('inf')
-        collision_point = None
-        normal = None
-        
-        for obs in obstacles:
-            # Calculate intersection with rectangle
-            t_near = pygame.Vector2(
-                (obs.left - start.x) / direction.x if direction.x != 0 else float('-inf'),
-                (obs.top - start.y) / direction.y if direction.y != 0 else float('-inf')
-            )
-            t_far = pygame.Vector2(
-                (obs.right - start.x) / direction.x if direction.x != 0 else float('inf'),
-                (obs.bottom - start.y) / direction.y if direction.y != 0 else float('inf')
-            )
-            
-            if t_near.x > t_far.x: t_near.x, t_far.x = t_far.x, t_near.x
-            if t_near.y > t_far.y: t_near.y, t_far.y = t_far.y, t_near.y
-            
-            t_min = max(t_near.x, t_near.y)
-            t_max = min(t_far.x, t_far.y)
-            
-            if t_min < t_max and 0 < t_min < max_distance and t_min < closest_t:
-                closest_t = t_min
-                collision_point = start + direction * t_min
-                
-                # Determine normal based on which side we hit
-                if t_min == t_near.x:
-                    normal = pygame.Vector2(-1, 0) if direction.x > 0 else pygame.Vector2(1, 0)
-                else:
-                    normal = pygame.Vector2(0, -1) if direction.y > 0 else pygame.Vector2(0, 1)
-        
-        return collision_point, normal
-
-    def check_collision(self):
-        for obs in static_obstacles:
-            if obs.collidepoint(self.position):
-                return True
-        return False
-
-    def record_collision(self):
-        grid_x = int(self.position.x // GRID_SIZE)
-        grid_y = int(self.position.y // GRID_SIZE)
-        if 0 <= grid_x < len(collision_map[0]) and 0 <= grid_y < len(collision_map):
+        return LIGHT_RESPONSE.between(sensor_pos, light_pos)
+
+    def check_collision(self, obstacle_grid):
+        return obstacle_grid.collides(self.position)
+
+    def record_collision(self, collision_map, now):
+        cell = collision_map.cell_of(self.position)
+        if cell is not None:
             # Add more memory strength for recent collisions
-            time_factor = max(0.5, 2.0 - (time.time() - self.last_collision_time))
-            collision_map[grid_y][grid_x] = min(10.0, collision_map[grid_y][grid_x] + 1.5 * time_factor)
+            time_factor = max(0.5, 2.0 - (now - self.last_collision_time))
+            collision_map.add(*cell, 1.5 * time_factor, limit=10.0)
             self.collision_count += 1
-            self.last_collision_time = time.time()
-
-    def check_avoidance_zone(self):
-        grid_x = int(self.position.x // GRID_SIZE)
-        grid_y = int(self.position.y // GRID_SIZE)
-        if 0 <= grid_x < len(collision_map[0]) and 0 <= grid_y < len(collision_map):
-            return collision_map[grid_y][grid_x]
-        return 0
-
-    def share_memory(self, bots):
-        """Share collision memory with nearby bots"""
-        grid_x = int(self.position.x // GRID_SIZE)
-        grid_y = int(self.position.y // GRID_SIZE)
-        
-        if not (0 <= grid_x < len(collision_map[0]) and 0 <= grid_y < len(collision_map)):
-            return
-            
-        my_value = collision_map[grid_y][grid_x]
-        
-        for bot in bots:
-            if bot is self:
-                continue
-                
-            dist = self.position.distance_to(bot.position)
-            if dist < MEMORY_SHARING_DISTANCE:
-                bot_grid_x = int(bot.position.x // GRID_SIZE)
-                bot_grid_y = int(bot.position.y // GRID_SIZE)
-                
-                if 0 <= bot_grid_x < len(collision_map[0]) and 0 <= bot_grid_y < len(collision_map):
-                    # Average the memory values
-                    avg = (my_value + collision_map[bot_grid_y][bot_grid_x]) * 0.5
-                    collision_map[grid_y][grid_x] = avg
-                    collision_map[bot_grid_y][bot_grid_x] = avg
+            self.last_collision_time = now
+
+    def check_avoidance_zone(self, collision_map):
+        return collision_map.value_at(self.position)
 
-    def avoid_collision(self, obstacles):
+    def avoid_collision(self, obstacle_grid, collision_map):
         """More sophisticated collision avoidance using raycasting"""
         self.raycast_points = []
         avoidance_vectors = []
         weights = []
         
-        # Cast rays in multiple directions
-        for angle in range(0, 360, 45):
+        # Cast rays in multiple directions, unless the world already did
+        if self.ray_hits is None:
+            distances, points, normals = cast_rays([self], obstacle_grid)
+            self.ray_hits = (distances[0], points[0], normals[0])
+        distances, points, normals = self.ray_hits
+        self.ray_hits = None
+
+        for i, angle in enumerate(RAY_ANGLES):
             ray_dir = pygame.Vector2(0, -1).rotate(angle)
-            end_point = self.position + ray_dir * 100
+            end_point = self.position + ray_dir * RAY_LENGTH
             
-            collision_point, normal = self.raycast(self.position, end_point, obstacles)
+            collision_point = None
+            if np.isfinite(distances[i]):
+                collision_point = pygame.Vector2(points[i][0], points[i][1])
             self.raycast_points.append((self.position, end_point, collision_point))
             
-            if collision_point:
-                dist = self.position.distance_to(collision_point)
-                strength = max(0, 1.0 - dist / 100)
+            if collision_point is not None:
+                strength = max(0, 1.0 - distances[i] / RAY_LENGTH)
                 
-                if normal:
-                    # Move away from the collision normal
-                    avoidance_vectors.append(normal)
-                    weights.append(strength * 2.0)  # Higher weight for direct obstacles
-                else:
-                    # If no normal, move away from collision point
-                    avoid_dir = (self.position - collision_point).normalize()
-                    avoidance_vectors.append(avoid_dir)
-                    weights.append(strength)
+                # Move away from the collision normal
+                avoidance_vectors.append(pygame.Vector2(normals[i][0], normals[i][1]))
+                weights.append(strength * 2.0)  # Higher weight for direct obstacles
         
         # Also consider memory-based avoidance
-        grid_x = int(self.position.x // GRID_SIZE)
-        grid_y = int(self.position.y // GRID_SIZE)
-        if 0 <= grid_x < len(collision_map[0]) and 0 <= grid_y < len(collision_map):
-            memory_val = collision_map[grid_y][grid_x]
+        cell = collision_map.cell_of(self.position)
+        if cell is not None:
+            grid_x, grid_y = cell
+            memory_val = collision_map.get(grid_x, grid_y)
             if memory_val > 2:
                 # Find the safest direction (away from danger grid center)
                 danger_center = pygame.Vector2(
@@ -244,13 +297,21 @@ class BraitenbergVehicle6:
             self.avoidance_vector = pygame.Vector2(0, 0)
             self.avoidance_strength = 0
 
-    def navigate(self, light_sources, surface, obstacles):
+    def step(self, world, dt):
+        """Advance the bot by ``dt`` seconds; tuned per frame at ``FPS``."""
+        frames = dt * FPS
+        collision_map = world.collision_map
+        t = profiler.start()
         self.update_sensors()
         self.path.append((self.position.x, self.position.y))
         
         # Calculate light intensities
-        current_left = sum(self.get_light_intensity(self.left_eye, light.location) for light in light_sources)
-        current_right = sum(self.get_light_intensity(self.right_eye, light.location) for light in light_sources)
+        if world.light_field is not None:
+            current_left = world.light_field.sample(self.left_eye)
+            current_right = world.light_field.sample(self.right_eye)
+        else:
+            current_left = sum(self.get_light_intensity(self.left_eye, light.location) for light in world.lights)
+            current_right = sum(self.get_light_intensity(self.right_eye, light.location) for light in world.lights)
         
         # Update history
         self.left_history.append(current_left)
@@ -260,6 +321,8 @@ class BraitenbergVehicle6:
         avg_left = sum(self.left_history) / len(self.left_history)
         avg_right = sum(self.right_history) / len(self.right_history)
         
+        t = profiler.stop("sense", t)
+        
         # Calculate deltas
         delta_left = current_left - avg_left
         delta_right = current_right - avg_right
@@ -277,20 +340,19 @@ class BraitenbergVehicle6:
         turn_rate = max(-self.max_turn_rate, min(turn_rate, self.max_turn_rate))
         
         # Update target heading
-        self.target_heading += turn_rate
+        self.target_heading += turn_rate * frames
         
         # Smooth heading transition
         heading_diff = (self.target_heading - self.heading) % 360
         if heading_diff > 180:
             heading_diff -= 360
             
-        max_turn = self.max_turn_rate * 0.8
+        max_turn = self.max_turn_rate * 0.8 * frames
         actual_turn = max(-max_turn, min(heading_diff, max_turn))
         self.heading += actual_turn
         
         # Check avoidance zones and obstacles
-        self.avoid_collision(obstacles)
-        avoidance_value = self.check_avoidance_zone()
+        self.avoid_collision(world.obstacle_grid, collision_map)
         
         # Apply avoidance if needed
         if self.avoidance_strength > 0:
@@ -301,86 +363,120 @@ class BraitenbergVehicle6:
             speed_factor = 1.0
             turn_factor = 1.0
         
+        t = profiler.stop("decide", t)
+        
         # Calculate movement speed
         speed = max(0.1, (left_wheel + right_wheel) / 2) * speed_factor
         movement = pygame.Vector2(0, -1).rotate(self.heading) * speed * self.max_speed
         
         # Update velocity with acceleration
-        self.velocity = self.velocity * 0.8 + movement * 0.2
+        keep = 0.8 ** frames
+        self.velocity = self.velocity * keep + movement * (1 - keep)
         
         # Save previous position for collision recovery
         prev_pos = self.position.copy()
-        self.position += self.velocity
+        self.position += self.velocity * frames
         
         # Handle collisions
-        if self.check_collision():
-            self.record_collision()
+        if self.check_collision(world.obstacle_grid):
+            self.record_collision(collision_map, world.time)
             self.position = prev_pos
             
-            # Bounce off obstacles
-            self.velocity = self.velocity.reflect(self.avoidance_vector) * 0.7
-            self.position += self.velocity
+            # Bounce off obstacles (straight back if no ray saw them)
+            if self.avoidance_vector.length_squared() > 0:
+                self.velocity = self.velocity.reflect(self.avoidance_vector) * 0.7
+            else:
+                self.velocity = -self.velocity * 0.7
+            self.position += self.velocity * frames
             
             # Turn away from collision
-            self.target_heading += random.uniform(60, 120)
+            self.target_heading += self.rng.uniform(60, 120)
         
         # Boundary wrapping
-        self.position.x = self.position.x % SCREEN_WIDTH
-        self.position.y = self.position.y % SCREEN_HEIGHT
-        
-        # Return telemetry
-        telemetry = [
+        world.wrap(self.position)
+        profiler.stop("move", t)
+
+        self.current_left = current_left
+        self.current_right = current_right
+        self.delta_left = delta_left
+        self.delta_right = delta_right
+        self.speed = speed
+
+    def state(self):
+        """``(x, y, heading, left_wheel, right_wheel, left_sensor, right_sensor)`` for recording."""
+        return (self.position.x, self.position.y, self.heading,
+                self.left_wheel_speed, self.right_wheel_speed, self.current_left, self.current_right)
+
+    def telemetry(self):
+        return [
             f"{self.name}",
-            f"ΔL: {delta_left:.2f}, ΔR: {delta_right:.2f}",
-            f"L: {current_left:.2f}, R: {current_right:.2f}",
-            f"Wheels: {left_wheel:.2f}/{right_wheel:.2f}",
-            f"Speed: {speed:.2f}, Avoid: {self.avoidance_strength:.2f}",
+            f"ΔL: {self.delta_left:.2f}, ΔR: {self.delta_right:.2f}",
+            f"L: {self.current_left:.2f}, R: {self.current_right:.2f}",
+            f"Wheels: {self.left_wheel_speed:.2f}/{self.right_wheel_speed:.2f}",
+            f"Speed: {self.speed:.2f}, Avoid: {self.avoidance_strength:.2f}",
             f"Collisions: {self.collision_count}"
         ]
-        
-        return telemetry
 
-    def render(self, surface):
+    def render(self, surface, font, camera=None, detail=DetailLevel.FULL):
+        """Draw the bot through ``camera``; returns the rects touched (path, ray fan, body, tag).
+
+        At ``DetailLevel.BODY`` only the body and heading are drawn.
+        """
+        drawn = []
+        if camera is None:
+            camera = Camera(surface.get_size(), surface.get_size())
+        to_screen = camera.to_screen
+        position = to_screen(self.position)
+
         # Dynamic color based on fear level
-        avoidance_value = self.check_avoidance_zone()
-        fear_level = min(1.0, avoidance_value / 5.0)
+        fear_level = self.fear_level
         r = int(BOT_COLOR[0] * (1 - fear_level) + DANGER_COLOR[0] * fear_level)
         g = int(BOT_COLOR[1] * (1 - fear_level) + DANGER_COLOR[1] * fear_level)
         b = int(BOT_COLOR[2] * (1 - fear_level) + DANGER_COLOR[2] * fear_level)
         dynamic_color = (r, g, b)
         
+        if detail == DetailLevel.BODY:
+            body = pygame.draw.circle(surface, dynamic_color, position, camera.scale(self.body_size))
+            head_pos = to_screen(self.position + pygame.Vector2(0, -self.body_size).rotate(self.heading))
+            body.union_ip(pygame.draw.line(surface, (255, 255, 255), position, head_pos, 2))
+            return [body]
+        
         # Draw path
         if len(self.path) > 1:
-            points = [(int(x), int(y)) for x, y in self.path]
-            pygame.draw.lines(surface, PATH_COLOR, False, points, 2)
+            drawn.append(pygame.draw.lines(surface, PATH_COLOR, False, camera.to_screen_many(self.path.ordered()).tolist(), 2))
         
         # Draw raycasts
+        fan = []
         for start, end, collision_point in self.raycast_points:
             color = (100, 255, 100, 150) if collision_point is None else (255, 100, 100, 200)
-            pygame.draw.line(surface, color, start, end, 1)
+            fan.append(pygame.draw.line(surface, color, to_screen(start), to_screen(end), 1))
             if collision_point:
-                pygame.draw.circle(surface, (255, 50, 50), (int(collision_point.x), int(collision_point.y)), 4)
+                fan.append(pygame.draw.circle(surface, (255, 50, 50), to_screen(collision_point), camera.scale(4)))
+        if fan:
+            drawn.append(fan[0].unionall(fan[1:]))
         
         # Draw avoidance vector
         if self.avoidance_strength > 0.1:
-            end_pos = self.position + self.avoidance_vector * 30 * self.avoidance_strength
-            pygame.draw.line(surface, (255, 150, 50), self.position, end_pos, 3)
-            pygame.draw.circle(surface, (255, 150, 50), (int(end_pos.x), int(end_pos.y)), 5)
+            end_pos = to_screen(self.position + self.avoidance_vector * 30 * self.avoidance_strength)
+            drawn.append(pygame.draw.line(surface, (255, 150, 50), position, end_pos, 3))
+            drawn.append(pygame.draw.circle(surface, (255, 150, 50), end_pos, camera.scale(5)))
         
         # Body and sensors
-        pygame.draw.circle(surface, dynamic_color, (int(self.position.x), int(self.position.y)), self.body_size)
-        pygame.draw.circle(surface, DETECTOR_COLOR, (int(self.left_eye.x), int(self.left_eye.y)), self.detector_size)
-        pygame.draw.circle(surface, DETECTOR_COLOR, (int(self.right_eye.x), int(self.right_eye.y)), self.detector_size)
+        body = pygame.draw.circle(surface, dynamic_color, position, camera.scale(self.body_size))
+        body.union_ip(pygame.draw.circle(surface, DETECTOR_COLOR, to_screen(self.left_eye), camera.scale(self.detector_size)))
+        body.union_ip(pygame.draw.circle(surface, DETECTOR_COLOR, to_screen(self.right_eye), camera.scale(self.detector_size)))
         
         # Direction indicator
         forward = pygame.Vector2(0, -1).rotate(self.heading)
-        head_pos = self.position + forward * self.body_size
-        pygame.draw.line(surface, (255, 255, 255), self.position, head_pos, 3)
+        head_pos = to_screen(self.position + forward * self.body_size)
+        body.union_ip(pygame.draw.line(surface, (255, 255, 255), position, head_pos, 3))
+        drawn.append(body)
         
         # Tag
-        tag = font.render(self.name, True, LABEL_COLOR)
-        tag_rect = tag.get_rect(center=(self.position.x, self.position.y - 25))
-        surface.blit(tag, tag_rect)
+        tag = render_text(font, self.name, LABEL_COLOR)
+        tag_rect = tag.get_rect(center=(position[0], position[1] - 25))
+        drawn.append(surface.blit(tag, tag_rect))
+        return drawn
 
 # Light source
 class GlowTarget:
@@ -395,119 +491,226 @@ class GlowTarget:
         if self.glow_size > 5 or self.glow_size < 0:
             self.glow_dir *= -1
 
-    def render(self, surface):
+    def render(self, surface, camera=None):
+        center = self.location if camera is None else camera.to_screen(self.location)
+        scale = 1 if camera is None else camera.zoom
         # Draw glow effect
-        pygame.draw.circle(surface, (255, 255, 150, 100), 
-                          (int(self.location.x), int(self.location.y)), 
-                          25 + self.glow_size)
+        glow = pygame.draw.circle(surface, (255, 255, 150, 100), 
+                                  (int(center[0]), int(center[1])), 
+                                  max(1, (25 + self.glow_size) * scale))
         pygame.draw.circle(surface, LIGHT_COLOR, 
-                          (int(self.location.x), int(self.location.y)), 
-                          15)
+                          (int(center[0]), int(center[1])), 
+                          max(1, 15 * scale))
+        return glow
 
-# Initialization
-bots = [
-    BraitenbergVehicle6((SCREEN_WIDTH - 80, SCREEN_HEIGHT - 80), -135, "Bot 1", 0),
-    BraitenbergVehicle6((100, 100), 45, "Bot 2", 1),
-    BraitenbergVehicle6((400, 300), 0, "Bot 3", 2),
-    BraitenbergVehicle6((SCREEN_WIDTH - 400, 100), 180, "Bot 4", 3)
-]
+# Drawing
+def draw_swarm(surface, bots, camera):
+    """Every bot as one fear-tinted dot, drawn in a single batch; returns the rect covered."""
+    if not bots:
+        return None
+    positions = camera.to_screen_many([(bot.position.x, bot.position.y) for bot in bots])
+    fear = np.array([bot.fear_level for bot in bots])[:, None]
+    colors = np.array(BOT_COLOR) * (1 - fear) + np.array(DANGER_COLOR) * fear
+    return draw_points(surface, positions, colors.astype(np.uint8))
 
-light_sources = [
-    GlowTarget((150, 150)),
-    GlowTarget((650, 450)),
-    GlowTarget((800, 200))
-]
+def draw_background(surface, world, font, title_font, camera=None):
+    surface.fill(BG_COLOR)
+    if camera is None:
+        for obs in world.obstacles:
+            pygame.draw.rect(surface, OBSTACLE_COLOR, obs)
+    else:
+        # Only the obstacles in the grid cells under the view
+        for i in world.obstacle_grid.candidates(*camera.view()):
+            pygame.draw.rect(surface, OBSTACLE_COLOR, camera.rect_to_screen(world.obstacles[i]))
 
-# Main Loop
-clock = pygame.time.Clock()
-running = True
-last_time = time.time()
-dirty_rects = []  # For optimized rendering
-
-# Draw static elements once
-background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-background.fill(BG_COLOR)
-for obs in static_obstacles:
-    pygame.draw.rect(background, OBSTACLE_COLOR, obs)
-window.blit(background, (0, 0))
-pygame.display.flip()
-
-while running:
-    current_time = time.time()
-    dt = min(0.033, current_time - last_time)  # Cap at 30ms
-    last_time = current_time
-    
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                running = False
-            elif event.key == pygame.K_r:  # Reset memory
-                collision_map = [[0 for _ in range(SCREEN_WIDTH // GRID_SIZE)] 
-                                for _ in range(SCREEN_HEIGHT // GRID_SIZE)]
-                memory_surface.fill((0, 0, 0, 0))
-    
-    # Update lights
-    for light in light_sources:
-        light.update()
-    
-    # Update collision memory decay
-    for y in range(len(collision_map)):
-        for x in range(len(collision_map[0])):
-            collision_map[y][x] *= COLLISION_DECAY
-    
-    # Update memory visualization
-    memory_surface.fill((0, 0, 0, 0))
-    for y in range(len(collision_map)):
-        for x in range(len(collision_map[0])):
-            danger = collision_map[y][x]
-            if danger > 0.1:
-                alpha = min(200, int(danger * 25))
-                rect = pygame.Rect(x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
-                pygame.draw.rect(memory_surface, (255, 50, 50, alpha), rect)
-    
-    # Draw background and static elements
-    window.blit(background, (0, 0))
-    window.blit(memory_surface, (0, 0))
-    
-    # Draw lights
-    for light in light_sources:
-        light.render(window)
-    
-    # Update and render vehicles
-    telemetry_data = []
-    for bot in bots:
-        telemetry = bot.navigate(light_sources, window, static_obstacles)
-        telemetry_data.append(telemetry)
-        bot.share_memory(bots)
-        bot.render(window)
-    
-    # Draw UI
-    pygame.draw.rect(window, (30, 30, 50, 200), (0, 0, SCREEN_WIDTH, 100))
-    title = title_font.render("Enhanced Braitenberg Vehicle 6 - Memory-Based Navigation", True, LABEL_COLOR)
-    window.blit(title, (20, 20))
-    
-    controls = font.render("R: Reset Memory | ESC: Quit", True, LABEL_COLOR)
-    window.blit(controls, (20, 60))
+    # The header never changes, so it is part of the cached scene
+    pygame.draw.rect(surface, (30, 30, 50, 200), (0, 0, surface.get_width(), 100))
+    draw_text(surface, title_font, "Enhanced Braitenberg Vehicle 6 - Memory-Based Navigation", LABEL_COLOR, (20, 20))
+    draw_text(surface, font, "R: Reset Memory | Arrows/Right-drag: Pan | Wheel/HOME: Zoom | F3: Profiler | F4: Profile CSV | F5: Detail | ESC: Quit",
+              LABEL_COLOR, (20, 60))
+
+def draw_ui(surface, world, font, bots=None, detail=None):
+    """Draw the live telemetry of ``bots`` (default: all of them); returns the rects touched."""
+    drawn = []
     
     # Draw telemetry
-    for i, telemetry in enumerate(telemetry_data):
-        for j, line in enumerate(telemetry):
+    for i, bot in enumerate(world.vehicles if bots is None else bots):
+        for j, line in enumerate(bot.telemetry()):
             x_pos = SCREEN_WIDTH - 220
             y_pos = 150 + j * 20 + i * 130
-            debug = font.render(line, True, LABEL_COLOR)
-            window.blit(debug, (x_pos, y_pos))
+            drawn.append(draw_text(surface, font, line, LABEL_COLOR, (x_pos, y_pos), live=True))
     
     # Draw memory info
-    total_memory = sum(sum(row) for row in collision_map)
-    memory_text = font.render(f"Memory Strength: {total_memory:.1f}", True, LABEL_COLOR)
-    window.blit(memory_text, (SCREEN_WIDTH - 220, SCREEN_HEIGHT - 30))
-    
-    pygame.display.flip()
-    clock.tick(FPS)
+    total_memory = world.collision_map.total()
+    drawn.append(draw_text(surface, font, f"Memory Strength: {total_memory:.1f}", LABEL_COLOR, (SCREEN_WIDTH - 220, SCREEN_HEIGHT - 30), live=True))
+    if detail is not None:
+        drawn.append(draw_text(surface, font, f"Detail: {detail.name}", LABEL_COLOR, (SCREEN_WIDTH - 220, SCREEN_HEIGHT - 50)))
+    return drawn
+
+# Initialization
+def create_world(seed=None, light_field=True, scale=1, region=None):
+    """The arena, or with ``scale`` > 1 a world of ``scale`` x ``scale`` screens tiled with it.
+
+    With a ``region`` ``(left, top, right, bottom)`` only the obstacles and
+    light field over it are built, for a shard that never senses further;
+    every bot is still created, so the rest can be dropped by position.
+    """
+    rng = random.Random(seed)
+    bots, light_sources, obstacles = [], [], []
+    for tile_y in range(scale):
+        for tile_x in range(scale):
+            origin = pygame.Vector2(tile_x * SCREEN_WIDTH, tile_y * SCREEN_HEIGHT)
+            for position, heading in (((SCREEN_WIDTH - 80, SCREEN_HEIGHT - 80), -135), ((100, 100), 45),
+                                      ((400, 300), 0), ((SCREEN_WIDTH - 400, 100), 180)):
+                index = len(bots)
+                bots.append(BraitenbergVehicle6(origin + position, heading, f"Bot {index + 1}", index, rng=spawn_rng(rng)))
+            for location in ((150, 150), (650, 450), (800, 200)):
+                light_sources.append(GlowTarget(origin + location))
+            obstacles.extend(rect.move(tile_x * SCREEN_WIDTH, tile_y * SCREEN_HEIGHT) for rect in static_obstacles)
+
+    width, height = SCREEN_WIDTH * scale, SCREEN_HEIGHT * scale
+    if region is not None:
+        left, top, right, bottom = region
+        obstacles = [rect for rect in obstacles
+                     if rect.right >= left and rect.left <= right and rect.bottom >= top and rect.top <= bottom]
+    # The lights never move, so their summed intensity is sampled from a grid
+    field = LightField(width, height, LIGHT_RESPONSE.many, reach=LIGHT_RESPONSE.reach, region=region) if light_field else None
+    return MemoryWorld(width, height, lights=light_sources,
+                       obstacles=obstacles, vehicles=bots, rng=rng, light_field=field)
+
+# Main Loop
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enhanced Braitenberg Vehicle 6")
+    parser.add_argument("--scale", type=int, default=1, help="world size in screens along each side")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--shared-memory", metavar="NAME",
+                        help="keep the collision memory in shared memory under NAME, for memory_viewer.py")
+    args = parser.parse_args(argv)
 
-pygame.quit()
+    pygame.init()
+    window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Enhanced Braitenberg Vehicle 6")
 
+    # Font
+    font = pygame.font.SysFont("Arial", 16)
+    title_font = pygame.font.SysFont("Arial", 24, bold=True)
+    profile_font = pygame.font.SysFont("monospace", 14)
+
+    world = create_world(args.seed, scale=args.scale)
+    if args.shared_memory:
+        memory = world.collision_map
+        world.collision_map = SharedCollisionMemory.create(memory.cols, memory.rows, memory.cell_size, name=args.shared_memory)
+        print(f"Collision memory shared as {world.collision_map.name}; view it with: python memory_viewer.py {args.shared_memory}")
+    camera = Camera(window.get_size(), (world.width, world.height))
+
+    # Static elements in view, redrawn only when the camera moves
+    compositor = Compositor()
+    compositor.add_static(lambda surface: draw_background(surface, world, font, title_font, camera))
+    background = compositor.static_surface(window.get_size())
+
+    # Memory grid visualization, rebuilt from the memory array when it changes,
+    # layered over the background into the scene dirty regions restore from
+    heatmap = MemoryHeatmap(world.collision_map, camera=camera)
+    scene = background.copy()
+    dirty = DirtyRegions()
+
+    # Simulation runs at FPS steps per second whatever the frame rate;
+    # a slow frame catches up by at most two steps (~33 ms)
+    clock = pygame.time.Clock()
+    scheduler = FixedTimestep(world, 1 / FPS, max_steps=2)
+    running = True
+
+    # How much of each bot to draw, from the count in view and how long drawing
+    # takes; it gets half the frame, the simulation the rest
+    detail = DetailLevel(budget_ms=500 / FPS)
+    render_ms = None
+
+    while running:
+        dt = clock.tick(FPS) / 1000
+        t = profiler.start()
+        view = camera.version
+        
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_r:  # Reset memory
+                    world.reset_memory()
+                    heatmap.invalidate()
+                elif event.key == pygame.K_F3:  # Toggle profiler overlay
+                    profiler.toggle()
+                    t = profiler.start()
+                elif event.key == pygame.K_F4:  # Toggle profile recording
+                    if profiler.recording:
+                        profiler.stop_csv()
+                    else:
+                        profiler.start_csv(time.strftime("profile-%Y%m%d-%H%M%S.csv"))
+                elif event.key == pygame.K_F5:  # Pin a detail level, or back to automatic
+                    detail.cycle()
+            camera.handle(event)
+        camera.update(dt)
+        t = profiler.stop("events", t)
+        
+        # Update lights
+        for light in world.lights:
+            light.update()
+        profiler.stop("lights", t)
+        
+        # Update collision memory and vehicles
+        scheduler.advance(dt)
+        
+        # Update memory visualization
+        t = profiler.start()
+        render_start = time.perf_counter()
+        if camera.version != view:
+            # The view moved: redraw the scene under it and repaint everything
+            compositor.invalidate()
+            background = compositor.static_surface(window.get_size())
+            if not heatmap.update():
+                heatmap.redraw()
+            scene = background.copy()
+            heatmap.draw(scene)
+            dirty.invalidate()
+        elif heatmap.update():
+            for rect in heatmap.changed:
+                scene.blit(background, rect, rect)
+                heatmap.draw(scene, rect)
+        t = profiler.stop("heatmap", t)
+        
+        # Erase last frame's dynamic drawing
+        dirty.restore(window, scene, heatmap.changed)
+        
+        # Draw lights in view
+        for light in world.lights:
+            if camera.sees(light.location, CULL_MARGIN):
+                dirty.add(light.render(window, camera))
+        
+        # Render vehicles in view
+        visible = world.vehicles_in(*camera.view(CULL_MARGIN))
+        tier = detail.choose(len(visible), render_ms)
+        if tier == DetailLevel.POINTS:
+            dirty.add(draw_swarm(window, visible, camera))
+        else:
+            for bot in visible:
+                dirty.add(bot.render(window, font, camera, tier))
+        
+        # Draw UI
+        dirty.add(draw_ui(window, world, font, visible[:TELEMETRY_BOTS], detail))
+        if profiler.enabled:
+            dirty.add(profiler.draw(window, profile_font, (20, 110)))
+        t = profiler.stop("render", t)
+        
+        dirty.present()
+        profiler.stop("flip", t)
+        profiler.frame()
+        render_ms = (time.perf_counter() - render_start) * 1000
 
+    profiler.stop_csv()
+    if args.shared_memory:
+        world.collision_map.close()
+    pygame.quit()
 
+if __name__ == "__main__":
+    main()
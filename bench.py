@@ -0,0 +1,247 @@
+"""Headless benchmarks of every vehicle model as entity counts grow.
+
+Each model is stepped and drawn off-screen (``SDL_VIDEODRIVER=dummy``)
+while one of its vehicle, light or obstacle counts is scaled by powers of
+ten and the others stay at one. Results are written as JSON so runs can be
+diffed against each other:
+
+    python bench.py --max-power 3 --output bench.json
+    python bench.py --models V3 V6 --axes vehicles --seconds 0.5
+    python bench.py --models SwarmV3 --axes vehicles --max-power 5
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import V1
+import V2
+import V3
+import V4
+import V6
+from rendering import Compositor, draw_points
+from swarm import SwarmV3
+from world import World, spawn_rng
+
+AXES = ("vehicles", "lights", "obstacles")
+
+
+def scatter(rng, count, width, height, margin=0):
+    return [(rng.uniform(margin, width - margin), rng.uniform(margin, height - margin)) for _ in range(count)]
+
+
+class Model:
+    """How to build, step and draw one vehicle script at arbitrary counts.
+
+    ``build(rng, vehicles, lights, obstacles)`` returns a world; ``background``
+    and ``draw`` mirror the script's static and dynamic layers but draw every
+    vehicle, so render time scales with the count being measured. ``axes``
+    lists the counts the model actually uses.
+    """
+
+    def __init__(self, name, module, build, background, draw, axes):
+        self.name = name
+        self.module = module
+        self.build = build
+        self.background = background
+        self.draw = draw
+        self.axes = axes
+
+    @property
+    def fps(self):
+        return self.module.FPS
+
+
+def build_v1(rng, vehicles, lights, obstacles):
+    circles = [V1.Circle(p, radius=rng.randint(10, 30), color=V1.BLUE) for p in scatter(rng, obstacles, V1.WIDTH, V1.HEIGHT)]
+    bots = [V1.Vehicle(p, rng=spawn_rng(rng)) for p in scatter(rng, vehicles, V1.WIDTH, V1.HEIGHT)]
+    return World(V1.WIDTH, V1.HEIGHT, obstacles=circles, vehicles=bots, rng=rng)
+
+
+def build_v2(rng, vehicles, lights, obstacles):
+    width, height = V2.SCREEN_WIDTH, V2.SCREEN_HEIGHT
+    bots = [V2.BraitenbergVehicle(p, rng.uniform(0, 360), rng=spawn_rng(rng)) for p in scatter(rng, vehicles, width, height)]
+    beacons = [V2.GlowTarget(p) for p in scatter(rng, lights, width, height)]
+    return World(width, height, lights=beacons, vehicles=bots, rng=rng)
+
+
+def build_v3(rng, vehicles, lights, obstacles):
+    width, height = V3.SCREEN_WIDTH, V3.SCREEN_HEIGHT
+    bots = [V3.BraitenbergVehicle3(p, rng.uniform(0, 360), rng=spawn_rng(rng)) for p in scatter(rng, vehicles, width, height)]
+    beacons = [V3.GlowTarget(p) for p in scatter(rng, lights, width, height)]
+    return World(width, height, lights=beacons, vehicles=bots, rng=rng)
+
+
+def build_swarm_v3(rng, vehicles, lights, obstacles):
+    width, height = V3.SCREEN_WIDTH, V3.SCREEN_HEIGHT
+    swarm = SwarmV3.random(vehicles, width, height, seed=rng.getrandbits(64))
+    beacons = [V3.GlowTarget(p) for p in scatter(rng, lights, width, height)]
+    # The whole swarm steps as the world's one "vehicle"; SwarmV3.step takes (world, dt)
+    return World(width, height, lights=beacons, vehicles=[swarm], rng=rng)
+
+
+def draw_swarm_v3(surface, world, fonts):
+    for light in world.lights:
+        light.render(surface)
+    draw_points(surface, world.vehicles[0].positions, V3.BOT_BODY)
+
+
+def build_v4(rng, vehicles, lights, obstacles):
+    width, height = V4.SCREEN_WIDTH, V4.SCREEN_HEIGHT
+    bots = [V4.BraitenbergVehicle4(p, rng.uniform(0, 360), rng=spawn_rng(rng)) for p in scatter(rng, vehicles, width, height)]
+    beacons = [V4.GlowTarget(p) for p in scatter(rng, lights, width, height)]
+    circles = [V4.Obstacle(p, rng.randint(20, 45)) for p in scatter(rng, obstacles, width, height)]
+    return World(width, height, lights=beacons, obstacles=circles, vehicles=bots, rng=rng)
+
+
+def build_v6(rng, vehicles, lights, obstacles):
+    width, height = V6.SCREEN_WIDTH, V6.SCREEN_HEIGHT
+    bots = [V6.BraitenbergVehicle6(p, rng.uniform(0, 360), f"Bot {i + 1}", i, rng=spawn_rng(rng))
+            for i, p in enumerate(scatter(rng, vehicles, width, height))]
+    beacons = [V6.GlowTarget(p) for p in scatter(rng, lights, width, height)]
+    rects = [pygame.Rect(int(x), int(y), rng.randint(20, 120), rng.randint(20, 120)) for x, y in scatter(rng, obstacles, width, height)]
+    return V6.MemoryWorld(width, height, lights=beacons, obstacles=rects, vehicles=bots, rng=rng)
+
+
+def draw_v6(surface, world, fonts):
+    for light in world.lights:
+        light.update()
+        light.render(surface)
+    for bot in world.vehicles:
+        bot.render(surface, fonts.body)
+    V6.draw_ui(surface, world, fonts.body)
+
+
+def background_v6(surface, world, fonts):
+    V6.draw_background(surface, world, fonts.body, fonts.title)
+
+
+MODELS = {
+    "V1": Model("V1", V1, build_v1, lambda s, w, f: V1.draw_background(s, w),
+                lambda s, w, f: V1.draw(s, w, f.body), ("vehicles", "obstacles")),
+    "V2": Model("V2", V2, build_v2, lambda s, w, f: V2.draw_background(s, w),
+                lambda s, w, f: V2.draw(s, w, f.body), ("vehicles", "lights")),
+    "V3": Model("V3", V3, build_v3, lambda s, w, f: V3.draw_background(s),
+                V3.draw, ("vehicles", "lights")),
+    "SwarmV3": Model("SwarmV3", V3, build_swarm_v3, lambda s, w, f: V3.draw_background(s),
+                     draw_swarm_v3, ("vehicles", "lights")),
+    "V4": Model("V4", V4, build_v4, lambda s, w, f: V4.draw_background(s, w),
+                lambda s, w, f: V4.draw(s, w, f.body), AXES),
+    "V6": Model("V6", V6, build_v6, background_v6, draw_v6, AXES),
+}
+
+
+def time_steps(world, dt, seconds, max_steps):
+    """Step until ``seconds`` have passed (or ``max_steps``); returns ``(steps, elapsed)``."""
+    steps = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds and steps < max_steps:
+        world.step(dt)
+        steps += 1
+        elapsed = time.perf_counter() - start
+    return steps, elapsed
+
+
+def time_frames(model, world, surface, fonts, frames):
+    """Mean and worst milliseconds to draw one frame (static layer blit + dynamic layers)."""
+    compositor = Compositor()
+    compositor.add_static(lambda target: model.background(target, world, fonts))
+    compositor.add_dynamic(lambda target: model.draw(target, world, fonts))
+    compositor.static_surface(surface.get_size())
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        compositor.render(surface)
+        times.append((time.perf_counter() - start) * 1000)
+        world.step(1 / model.fps)
+    return float(np.mean(times)), float(np.max(times))
+
+
+def run_case(model, counts, surface, fonts, seconds=1.0, max_steps=100_000, frames=30, seed=0):
+    world = model.build(random.Random(seed), counts["vehicles"], counts["lights"], counts["obstacles"])
+    dt = 1 / model.fps
+    world.step(dt)  # Warm up caches and lazily built state
+    steps, elapsed = time_steps(world, dt, seconds, max_steps)
+    render_ms, render_worst_ms = time_frames(model, world, surface, fonts, frames)
+    return {
+        "model": model.name,
+        **counts,
+        "steps": steps,
+        "steps_per_sec": steps / elapsed,
+        "step_ms": elapsed / steps * 1000,
+        "vehicle_steps_per_sec": steps * counts["vehicles"] / elapsed,
+        "render_ms": render_ms,
+        "render_worst_ms": render_worst_ms,
+    }
+
+
+def run(models, axes, max_power, seconds, frames, seed, budget_ms, log=sys.stderr):
+    """Scale each axis of each model by powers of ten; stop an axis once a step exceeds ``budget_ms``."""
+    pygame.init()
+    surface = pygame.display.set_mode((1000, 800))
+    fonts = V3.Fonts()
+    results = []
+    for name in models:
+        model = MODELS[name]
+        for axis in axes:
+            if axis not in model.axes:
+                continue
+            for power in range(max_power + 1):
+                counts = dict.fromkeys(AXES, 1)
+                counts[axis] = 10 ** power
+                result = run_case(model, counts, surface, fonts, seconds=seconds, frames=frames, seed=seed)
+                result["axis"] = axis
+                results.append(result)
+                print(f"{name} {axis}={counts[axis]}: {result['steps_per_sec']:.0f} steps/s, "
+                      f"render {result['render_ms']:.2f} ms", file=log)
+                if result["step_ms"] > budget_ms:
+                    break
+    pygame.quit()
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", nargs="+", choices=sorted(MODELS), default=sorted(MODELS))
+    parser.add_argument("--axes", nargs="+", choices=AXES, default=list(AXES))
+    parser.add_argument("--max-power", type=int, default=3, help="scale counts up to 10**N")
+    parser.add_argument("--seconds", type=float, default=1.0, help="stepping time per case")
+    parser.add_argument("--frames", type=int, default=30, help="frames drawn per case")
+    parser.add_argument("--budget-ms", type=float, default=1000.0,
+                        help="stop scaling an axis once one step takes longer than this")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file to write (default: stdout)")
+    args = parser.parse_args(argv)
+
+    results = run(args.models, args.axes, args.max_power, args.seconds, args.frames, args.seed, args.budget_ms)
+    report = {"environment": environment(), "settings": vars(args), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Scrollable, zoomable viewport onto a world that can be larger than the window."""
+
+import numpy as np
+import pygame
+
+PAN_SPEED = 800  # Screen pixels per second while an arrow key is held
+ZOOM_STEP = 1.15  # Zoom factor per mouse wheel notch
+MAX_ZOOM = 4.0
+
+
+class Camera:
+    """Maps world coordinates to a ``viewport`` of screen pixels.
+
+    ``offset`` is the world point at the viewport's top-left and ``zoom``
+    the screen pixels per world unit. Zooming out stops once the whole
+    world fits, and the view is kept inside the world (centred along an
+    axis the world no longer fills), so a world the size of the viewport
+    gets a camera that cannot move. ``version`` changes whenever the view
+    does, for callers caching anything drawn through it.
+
+    Arrow keys and right-drag pan, the mouse wheel zooms about the cursor
+    and HOME zooms out to the whole world.
+    """
+
+    def __init__(self, viewport, world_size, zoom=1.0, max_zoom=MAX_ZOOM):
+        self.width, self.height = viewport
+        self.world_width, self.world_height = world_size
+        self.min_zoom = min(1.0, self.width / self.world_width, self.height / self.world_height)
+        self.max_zoom = max(max_zoom, self.min_zoom)
+        self.offset = pygame.Vector2()
+        self.zoom = min(max(zoom, self.min_zoom), self.max_zoom)
+        self.version = 0
+        self.dragging = False
+        self.clamp()
+
+    def clamp(self):
+        for axis, size, world in ((0, self.width, self.world_width), (1, self.height, self.world_height)):
+            span = size / self.zoom
+            if span >= world:
+                self.offset[axis] = (world - span) / 2
+            else:
+                self.offset[axis] = min(max(self.offset[axis], 0.0), world - span)
+
+    def view(self, margin=0):
+        """The visible world box ``(left, top, right, bottom)``, grown by ``margin`` world units."""
+        left, top = self.offset
+        return (left - margin, top - margin,
+                left + self.width / self.zoom + margin, top + self.height / self.zoom + margin)
+
+    def sees(self, point, margin=0):
+        left, top, right, bottom = self.view(margin)
+        return left <= point[0] <= right and top <= point[1] <= bottom
+
+    def to_screen(self, point):
+        return (point[0] - self.offset.x) * self.zoom, (point[1] - self.offset.y) * self.zoom
+
+    def to_screen_many(self, points):
+        """(N, 2) world points as screen points."""
+        return (np.asarray(points, dtype=np.float64) - (self.offset.x, self.offset.y)) * self.zoom
+
+    def to_world(self, point):
+        return point[0] / self.zoom + self.offset.x, point[1] / self.zoom + self.offset.y
+
+    def rect_to_screen(self, rect):
+        """A world ``pygame.Rect`` as the screen rect it covers."""
+        left, top = self.to_screen(rect.topleft)
+        right, bottom = self.to_screen(rect.bottomright)
+        left, top = int(np.floor(left)), int(np.floor(top))
+        return pygame.Rect(left, top, int(np.ceil(right)) - left, int(np.ceil(bottom)) - top)
+
+    def scale(self, length, minimum=1):
+        """A world length in whole screen pixels, at least ``minimum``."""
+        return max(minimum, round(length * self.zoom))
+
+    def move(self, offset=None, zoom=None):
+        """Set the view; returns whether it changed."""
+        before = (self.offset.x, self.offset.y, self.zoom)
+        if zoom is not None:
+            self.zoom = min(max(zoom, self.min_zoom), self.max_zoom)
+        if offset is not None:
+            self.offset.update(offset)
+        self.clamp()
+        if (self.offset.x, self.offset.y, self.zoom) == before:
+            return False
+        self.version += 1
+        return True
+
+    def pan(self, dx, dy):
+        """Scroll by ``(dx, dy)`` screen pixels."""
+        return self.move(self.offset + pygame.Vector2(dx, dy) / self.zoom)
+
+    def zoom_at(self, factor, anchor):
+        """Zoom by ``factor`` keeping the world point under screen point ``anchor`` in place."""
+        x, y = self.to_world(anchor)
+        zoom = min(max(self.zoom * factor, self.min_zoom), self.max_zoom)
+        return self.move((x - anchor[0] / zoom, y - anchor[1] / zoom), zoom)
+
+    def handle(self, event):
+        """React to a mouse or key event; returns whether the view changed."""
+        if event.type == pygame.MOUSEWHEEL:
+            return self.zoom_at(ZOOM_STEP ** event.y, pygame.mouse.get_pos())
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+            self.dragging = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+            self.dragging = False
+        elif event.type == pygame.MOUSEMOTION and self.dragging:
+            return self.pan(-event.rel[0], -event.rel[1])
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_HOME:
+            return self.move(zoom=self.min_zoom)
+        return False
+
+    def update(self, dt):
+        """Pan with the arrow keys held down; returns whether the view changed."""
+        keys = pygame.key.get_pressed()
+        dx = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
+        dy = keys[pygame.K_DOWN] - keys[pygame.K_UP]
+        if not (dx or dy):
+            return False
+        return self.pan(dx * PAN_SPEED * dt, dy * PAN_SPEED * dt)
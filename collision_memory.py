@@ -0,0 +1,226 @@
+"""Grid of remembered collision danger with lazily applied decay."""
+
+import contextlib
+import os
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# Fold the pending decay into the array once the scale drops this low
+RENORMALIZE_BELOW = 1e-12
+
+
+class CollisionMemory:
+    """Danger values per grid cell, backed by a float32 array.
+
+    Decay is global and lazy: the array holds values divided by ``scale``
+    and ``decay()`` only shrinks ``scale``, so it is O(1) however fine the
+    grid is. Reads multiply back by ``scale``. A running sum of the stored
+    values keeps ``total()`` O(1) as well.
+    """
+
+    def __init__(self, cols, rows, cell_size):
+        self.cols = cols
+        self.rows = rows
+        self.cell_size = cell_size
+        self.reset()
+
+    def reset(self):
+        self.stored = np.zeros((self.rows, self.cols), dtype=np.float32)
+        self.scale = 1.0
+        self.stored_total = 0.0
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    def cell_of(self, position):
+        """Grid ``(x, y)`` of a world position, or None if it is off the grid."""
+        grid_x = int(position[0] // self.cell_size)
+        grid_y = int(position[1] // self.cell_size)
+        if 0 <= grid_x < self.cols and 0 <= grid_y < self.rows:
+            return grid_x, grid_y
+        return None
+
+    def cells_of(self, positions):
+        """Flat cell indices of (N, 2) world positions, and a mask of those on the grid."""
+        grid = np.floor_divide(np.asarray(positions, dtype=np.float64).reshape(-1, 2), self.cell_size).astype(np.int64)
+        on_grid = (grid[:, 0] >= 0) & (grid[:, 0] < self.cols) & (grid[:, 1] >= 0) & (grid[:, 1] < self.rows)
+        return np.where(on_grid, grid[:, 1] * self.cols + grid[:, 0], 0), on_grid
+
+    def gather(self, cells):
+        """Current values of flat ``cells``."""
+        return self.stored.reshape(-1)[cells].astype(np.float64) * self.scale
+
+    def scatter(self, cells, values):
+        """Write ``values`` into distinct flat ``cells``."""
+        flat = self.stored.reshape(-1)
+        old = flat[cells].sum(dtype=np.float64)
+        flat[cells] = np.asarray(values) / self.scale
+        self.stored_total += flat[cells].sum(dtype=np.float64) - old
+
+    def get(self, grid_x, grid_y):
+        return float(self.stored[grid_y, grid_x]) * self.scale
+
+    def set(self, grid_x, grid_y, value):
+        old = float(self.stored[grid_y, grid_x])
+        self.stored[grid_y, grid_x] = value / self.scale
+        self.stored_total += float(self.stored[grid_y, grid_x]) - old
+
+    def add(self, grid_x, grid_y, amount, limit=None):
+        value = self.get(grid_x, grid_y) + amount
+        if limit is not None:
+            value = min(limit, value)
+        self.set(grid_x, grid_y, value)
+
+    def value_at(self, position):
+        """Danger at a world position; 0 off the grid."""
+        cell = self.cell_of(position)
+        if cell is None:
+            return 0
+        return self.get(*cell)
+
+    def decay(self, factor):
+        """Multiply every cell by ``factor``."""
+        self.scale *= factor
+        if self.scale < RENORMALIZE_BELOW:
+            self.stored *= np.float32(self.scale)
+            self.scale = 1.0
+            self.stored_total = float(self.stored.sum(dtype=np.float64))
+
+    def total(self):
+        return self.stored_total * self.scale
+
+    def values(self):
+        """Materialised (rows, cols) float32 array of current values."""
+        return self.stored * np.float32(self.scale)
+
+
+# Header slots of a shared map, as float64s ahead of the cell array
+COLS, ROWS, CELL_SIZE, SCALE, TOTAL = range(5)
+HEADER_BYTES = 64
+
+
+class SharedCollisionMemory(CollisionMemory):
+    """A ``CollisionMemory`` whose cells and decay scale live in ``multiprocessing.shared_memory``.
+
+    ``create()`` allocates a named block; other processes ``attach(name)``
+    to the same block and read and write the same NumPy views, so nothing
+    is copied or pickled between them. The grid shape, ``scale`` and the
+    running total sit in a small header, so lazy decay stays O(1) and is
+    seen by every process at once. ``attach(name, readonly=True)`` gives a
+    view whose arrays reject writes, e.g. for a visualizer.
+
+    Writes are not atomic across processes: give writers a shared
+    ``multiprocessing.RLock`` as ``lock`` if they can touch the same cells
+    (``add`` takes it again through ``set``).
+    ``decay()`` scales the shared ``scale``, so it compounds across
+    processes: exactly one process should decay the map each step, or N
+    writers decay it N times.
+    Processes forked after ``create()`` inherit the block and need not
+    attach. Only the creator unlinks it, in ``close()``.
+    """
+
+    def __init__(self, shm, owner, readonly=False, lock=None):
+        self.shm = shm
+        self.owner = owner
+        self.readonly = readonly
+        self.lock = lock
+        self.header = np.ndarray((5,), dtype=np.float64, buffer=shm.buf)
+        self.cols, self.rows, self.cell_size = (int(value) for value in self.header[:3])
+        self.stored = np.ndarray((self.rows, self.cols), dtype=np.float32, buffer=shm.buf, offset=HEADER_BYTES)
+        if readonly:
+            self.header.flags.writeable = False
+            self.stored.flags.writeable = False
+
+    @classmethod
+    def create(cls, cols, rows, cell_size, name=None, lock=None):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_BYTES + rows * cols * 4)
+        header = np.ndarray((5,), dtype=np.float64, buffer=shm.buf)
+        header[:3] = cols, rows, cell_size
+        del header  # Views must not outlive the block when it is closed
+        memory = cls(shm, owner=True, lock=lock)
+        memory.reset()
+        return memory
+
+    @classmethod
+    def attach(cls, name, readonly=False, lock=None, track=True):
+        """Map the block another process created under ``name``.
+
+        Processes the creator started with ``multiprocessing`` share its
+        resource tracker and keep the default. An unrelated process (e.g.
+        ``memory_viewer.py``) passes ``track=False``, or its own tracker
+        unlinks the block when it exits.
+        """
+        if track:
+            shm = shared_memory.SharedMemory(name=name)
+        elif sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            # Only POSIX registers blocks, under the name with its leading slash
+            if os.name == "posix":
+                resource_tracker.unregister(f"/{shm.name}", "shared_memory")
+        return cls(shm, owner=False, readonly=readonly, lock=lock)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def scale(self):
+        return float(self.header[SCALE])
+
+    @scale.setter
+    def scale(self, value):
+        self.header[SCALE] = value
+
+    @property
+    def stored_total(self):
+        return float(self.header[TOTAL])
+
+    @stored_total.setter
+    def stored_total(self, value):
+        self.header[TOTAL] = value
+
+    def locked(self):
+        return self.lock if self.lock is not None else contextlib.nullcontext()
+
+    def reset(self):
+        with self.locked():
+            self.stored[...] = 0
+            self.scale = 1.0
+            self.stored_total = 0.0
+
+    def scatter(self, cells, values):
+        with self.locked():
+            super().scatter(cells, values)
+
+    def set(self, grid_x, grid_y, value):
+        with self.locked():
+            super().set(grid_x, grid_y, value)
+
+    def add(self, grid_x, grid_y, amount, limit=None):
+        with self.locked():
+            super().add(grid_x, grid_y, amount, limit)
+
+    def decay(self, factor):
+        with self.locked():
+            super().decay(factor)
+
+    def close(self):
+        """Drop this process's views; the creator also frees the block."""
+        if self.shm is None:
+            return
+        self.header = self.stored = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
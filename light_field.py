@@ -0,0 +1,159 @@
+"""Summed light intensity precomputed over the world, for lights that rarely move."""
+
+import math
+from collections import Counter
+
+import numpy as np
+
+RESOLUTION = 4  # World units between grid nodes
+MARGIN = 64  # Eyes can reach past the world edge before a vehicle wraps
+CHUNK_NODES = 1 << 20  # Node x light pairs evaluated at once while building
+
+
+def light_key(lights):
+    return tuple((light.location.x, light.location.y) for light in lights)
+
+
+class LightField:
+    """Intensity summed over a static light set, sampled bilinearly.
+
+    ``response`` maps an array of squared distances to per-light intensities
+    (e.g. ``ResponseCurve.many``); it is evaluated once per grid node and
+    light when the field is built, after
+    which sensing costs four lookups per eye however many lights there are.
+    Points past ``margin`` outside the world are clamped to the edge of the
+    grid.
+
+    With a ``reach`` (the distance past which ``response`` is zero, or below
+    the cutoff worth keeping) each light only touches the nodes within it,
+    and ``sync(lights)`` updates the field incrementally: lights that moved,
+    appeared or disappeared since the last sync have their old contribution
+    subtracted and their new one added. All edits between two syncs are
+    applied together, so dragging a light across many mouse events costs
+    one update per step.
+
+    A ``region`` ``(left, top, right, bottom)`` keeps only the nodes covering
+    that part of the world (e.g. one shard's tile and its surroundings).
+    Samples inside it match the whole field's exactly; outside it they are
+    clamped to its edge.
+    """
+
+    def __init__(self, width, height, response, resolution=RESOLUTION, margin=MARGIN, reach=None, region=None):
+        self.width = width
+        self.height = height
+        self.response = response
+        self.resolution = resolution
+        self.margin = margin
+        self.reach = reach
+        cols = math.ceil((width + 2 * margin) / resolution) + 1
+        rows = math.ceil((height + 2 * margin) / resolution) + 1
+        if region is None:
+            self.col0, self.row0 = 0, 0
+        else:
+            left, top, right, bottom = region
+            self.col0 = min(max(0, math.floor((left + margin) / resolution)), cols - 2)
+            self.row0 = min(max(0, math.floor((top + margin) / resolution)), rows - 2)
+            cols = max(2, min(cols, math.ceil((right + margin) / resolution) + 1) - self.col0)
+            rows = max(2, min(rows, math.ceil((bottom + margin) / resolution) + 1) - self.row0)
+        self.cols = cols
+        self.rows = rows
+        self.values = np.zeros((self.rows, self.cols))
+        self.key = None
+
+    def nodes(self):
+        """World coordinates of the grid nodes, as (rows, cols) x and y arrays."""
+        xs = np.arange(self.col0, self.col0 + self.cols) * self.resolution - self.margin
+        ys = np.arange(self.row0, self.row0 + self.rows) * self.resolution - self.margin
+        return np.meshgrid(xs, ys)
+
+    def build(self, lights):
+        key = light_key(lights)
+        if self.reach is not None:
+            self.values = np.zeros((self.rows, self.cols))
+            for position in key:
+                self.splat(position, 1)
+            self.key = key
+            return
+        x, y = self.nodes()
+        x, y = x.ravel(), y.ravel()
+        total = np.zeros(x.size)
+        positions = np.array(key, dtype=np.float64).reshape(-1, 2)
+        step = max(1, CHUNK_NODES // max(1, x.size))
+        for start in range(0, len(positions), step):
+            chunk = positions[start:start + step]
+            distance_sq = (x[:, None] - chunk[:, 0]) ** 2 + (y[:, None] - chunk[:, 1]) ** 2
+            total += self.response(distance_sq).sum(axis=1)
+        self.values = total.reshape(self.rows, self.cols)
+        self.key = key
+
+    def splat(self, position, sign):
+        """Add (``sign`` 1) or remove (-1) one light's contribution within ``reach``."""
+        x, y = position
+        res, margin = self.resolution, self.margin
+        col0 = max(self.col0, math.floor((x - self.reach + margin) / res))
+        col1 = min(self.col0 + self.cols, math.ceil((x + self.reach + margin) / res) + 1)
+        row0 = max(self.row0, math.floor((y - self.reach + margin) / res))
+        row1 = min(self.row0 + self.rows, math.ceil((y + self.reach + margin) / res) + 1)
+        if col0 >= col1 or row0 >= row1:
+            return
+        xs = np.arange(col0, col1) * res - margin
+        ys = np.arange(row0, row1) * res - margin
+        distance_sq = (xs[None, :] - x) ** 2 + (ys[:, None] - y) ** 2
+        contribution = self.response(distance_sq)
+        contribution[distance_sq > self.reach ** 2] = 0
+        window = self.values[row0 - self.row0:row1 - self.row0, col0 - self.col0:col1 - self.col0]
+        if sign > 0:
+            window += contribution
+        else:
+            window -= contribution
+
+    def sync(self, lights):
+        """Bring the field up to date with ``lights``; returns whether anything changed."""
+        key = light_key(lights)
+        if key == self.key:
+            return False
+        if self.reach is None or self.key is None:
+            self.build(lights)
+            return True
+        old, new = Counter(self.key), Counter(key)
+        removed, added = old - new, new - old
+        # Once most lights changed a rebuild touches no more nodes, and drops rounding drift
+        if sum(removed.values()) + sum(added.values()) >= len(key):
+            self.build(lights)
+            return True
+        for position, count in removed.items():
+            for _ in range(count):
+                self.splat(position, -1)
+        for position, count in added.items():
+            for _ in range(count):
+                self.splat(position, 1)
+        self.key = key
+        return True
+
+    def sample(self, point):
+        """Bilinearly interpolated intensity at one world point."""
+        # Grid coordinates stay whole-field ones, so a region samples bit for bit the same
+        gx = min(max((point[0] + self.margin) / self.resolution, self.col0), self.col0 + self.cols - 1.000001)
+        gy = min(max((point[1] + self.margin) / self.resolution, self.row0), self.row0 + self.rows - 1.000001)
+        col, row = int(gx), int(gy)
+        fx, fy = gx - col, gy - row
+        col -= self.col0
+        row -= self.row0
+        values = self.values
+        top = values.item(row, col) * (1 - fx) + values.item(row, col + 1) * fx
+        bottom = values.item(row + 1, col) * (1 - fx) + values.item(row + 1, col + 1) * fx
+        return top * (1 - fy) + bottom * fy
+
+    def sample_many(self, points):
+        """Intensity at (N, 2) world points."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        gx = np.clip((points[:, 0] + self.margin) / self.resolution, self.col0, self.col0 + self.cols - 1.000001)
+        gy = np.clip((points[:, 1] + self.margin) / self.resolution, self.row0, self.row0 + self.rows - 1.000001)
+        col, row = gx.astype(np.int64), gy.astype(np.int64)
+        fx, fy = gx - col, gy - row
+        col -= self.col0
+        row -= self.row0
+        values = self.values
+        top = values[row, col] * (1 - fx) + values[row, col + 1] * fx
+        bottom = values[row + 1, col] * (1 - fx) + values[row + 1, col + 1] * fx
+        return top * (1 - fy) + bottom * fy
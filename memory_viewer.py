@@ -0,0 +1,68 @@
+"""Live read-only view of a collision memory another process shares.
+
+Start the simulation with its memory in shared memory, then attach from
+any other process; the viewer maps the same cells and never copies them
+or writes to them:
+
+    python V6.py --scale 4 --shared-memory v6-memory
+    python memory_viewer.py v6-memory
+"""
+
+import argparse
+
+import pygame
+
+from camera import Camera
+from collision_memory import SharedCollisionMemory
+from rendering import MemoryHeatmap, draw_text
+
+BG_COLOR = (10, 10, 25)
+LABEL_COLOR = (220, 220, 255)
+MAX_WINDOW = (1000, 800)
+
+
+def run(name, fps=30):
+    memory = SharedCollisionMemory.attach(name, readonly=True, track=False)
+    world_size = (memory.cols * memory.cell_size, memory.rows * memory.cell_size)
+    fit = min(1.0, MAX_WINDOW[0] / world_size[0], MAX_WINDOW[1] / world_size[1])
+
+    pygame.init()
+    window = pygame.display.set_mode((round(world_size[0] * fit), round(world_size[1] * fit)))
+    pygame.display.set_caption(f"Collision memory: {name}")
+    font = pygame.font.SysFont("Arial", 16)
+    camera = Camera(window.get_size(), world_size)
+    heatmap = MemoryHeatmap(memory, camera=camera)
+
+    clock = pygame.time.Clock()
+    running = True
+    while running:
+        view = camera.version
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            else:
+                camera.handle(event)
+        camera.update(clock.get_time() / 1000)
+        if not heatmap.update() and camera.version != view:
+            heatmap.redraw()
+
+        window.fill(BG_COLOR)
+        heatmap.draw(window)
+        draw_text(window, font, f"Memory Strength: {memory.total():.1f}", LABEL_COLOR, (10, 10), live=True)
+        pygame.display.flip()
+        clock.tick(fps)
+
+    pygame.quit()
+    memory.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("name", help="shared memory name given to V6.py --shared-memory")
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args(argv)
+    run(args.name, args.fps)
+
+
+if __name__ == "__main__":
+    main()
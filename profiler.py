@@ -0,0 +1,144 @@
+"""Named per-frame phase timers with rolling percentiles, an overlay and CSV export.
+
+Timing is split, not nested: a phase starts where the previous one stopped,
+
+    t = profiler.start()
+    ...                         # sensing
+    t = profiler.stop("sense", t)
+    ...                         # deciding
+    profiler.stop("decide", t)
+
+and the same name can be stopped many times a frame (once per vehicle);
+the times add up. ``frame()`` closes the frame. ``enabled`` only decides
+whether the overlay is drawn; timing runs while it is enabled or a CSV is
+being recorded. Otherwise ``start`` and ``stop`` return straight away, so
+the calls can stay in hot loops.
+"""
+
+import csv
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+from rendering import draw_text
+
+# Phases in the order they are listed in the overlay and CSV
+PHASES = ("events", "lights", "decay", "raycast", "sense", "decide", "move",
+          "share_memory", "heatmap", "render", "flip", "total")
+PERCENTILES = (50, 95, 99)
+
+
+class Profiler:
+    """Accumulates phase times per frame and keeps the last ``window`` frames."""
+
+    def __init__(self, window=240, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self.timing = enabled  # enabled or recording, kept as a plain attribute for the hot path
+        self.names = list(PHASES)
+        self.samples = {}
+        self.current = {}
+        self.frames = 0
+        self.frame_start = None
+        self.csv_file = None
+        self.csv_writer = None
+        self.csv_columns = None
+
+    def start(self):
+        return perf_counter() if self.timing else 0.0
+
+    def stop(self, name, start):
+        """Add the time since ``start`` to ``name``; returns now, to start the next phase."""
+        if not self.timing or not start:
+            return 0.0
+        now = perf_counter()
+        self.current[name] = self.current.get(name, 0.0) + now - start
+        return now
+
+    def toggle(self):
+        """Show or hide the overlay."""
+        self.enabled = not self.enabled
+        self._update_timing()
+
+    def _update_timing(self):
+        timing = self.enabled or self.recording
+        if timing != self.timing:
+            self.timing = timing
+            self.current = {}
+            self.frame_start = None
+
+    def frame(self):
+        """Close the current frame: record its phase times and stream them to CSV."""
+        if not self.timing:
+            return
+        now = perf_counter()
+        if self.frame_start is not None:
+            self.current["total"] = now - self.frame_start
+        self.frame_start = now
+        for name, seconds in self.current.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+                if name not in self.names:
+                    self.names.append(name)
+            samples.append(seconds * 1000)
+        if self.csv_writer is not None:
+            self.csv_writer.writerow([self.frames] + [f"{self.current[name] * 1000:.4f}" if name in self.current else ""
+                                                      for name in self.csv_columns])
+        self.frames += 1
+        self.current = {}
+
+    def percentiles(self, name, q=PERCENTILES):
+        """Rolling percentiles of ``name`` in milliseconds, or None before any sample."""
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        return np.percentile(np.fromiter(samples, dtype=np.float64, count=len(samples)), q)
+
+    def summary(self, q=PERCENTILES):
+        """``(name, percentiles)`` for every phase seen, in ``PHASES`` order."""
+        rows = []
+        for name in self.names:
+            values = self.percentiles(name, q)
+            if values is not None:
+                rows.append((name, values))
+        return rows
+
+    def start_csv(self, path):
+        """Stream one row per frame (milliseconds per phase) to ``path``."""
+        self.stop_csv()
+        self.csv_file = open(path, "w", newline="")
+        self.csv_writer = csv.writer(self.csv_file)
+        self.csv_columns = list(self.names)
+        self.csv_writer.writerow(["frame"] + self.csv_columns)
+        self._update_timing()
+
+    def stop_csv(self):
+        if self.csv_file is not None:
+            self.csv_file.close()
+        self.csv_file = self.csv_writer = self.csv_columns = None
+        self._update_timing()
+
+    @property
+    def recording(self):
+        return self.csv_writer is not None
+
+    def draw(self, surface, font, dest, color=(220, 220, 255), background=(20, 20, 35)):
+        """Draw the percentile table with its top-left at ``dest``; returns the covered rect."""
+        rows = self.summary()
+        header = "phase       " + "".join(f"p{q:<7}" for q in PERCENTILES) + ("  [CSV]" if self.recording else "")
+        line_height = font.get_linesize()
+        panel = pygame.Rect(dest, (font.size(header)[0] + 20, (len(rows) + 1) * line_height + 10))
+        pygame.draw.rect(surface, background, panel)
+        x, y = dest[0] + 10, dest[1] + 5
+        draw_text(surface, font, header, color, (x, y))
+        for i, (name, values) in enumerate(rows):
+            text = f"{name:<12}" + "".join(f"{value:<8.2f}" for value in values)
+            draw_text(surface, font, text, color, (x, y + (i + 1) * line_height), live=True)
+        return panel
+
+
+# Shared so simulation code and the frame loop add into the same frame
+profiler = Profiler()
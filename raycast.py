@@ -0,0 +1,95 @@
+"""Vectorised ray/rectangle intersection for many vehicles at once."""
+
+import numpy as np
+
+# Upper bound on vehicles x rays x rectangles handled in one broadcast
+CHUNK_ELEMENTS = 1 << 21
+
+
+def rect_array(rects):
+    """Pack ``pygame.Rect``-likes into a (K, 4) array of left, top, right, bottom."""
+    return np.array([(r.left, r.top, r.right, r.bottom) for r in rects], dtype=np.float64).reshape(-1, 4)
+
+
+def ray_directions(angles):
+    """Unit vectors for headings in degrees, as ``Vector2(0, -1).rotate(angle)``."""
+    radians = np.radians(np.asarray(angles, dtype=np.float64))
+    directions = np.stack((np.sin(radians), -np.cos(radians)), axis=-1)
+    # Snap the axis-aligned rays so their slab test sees an exact zero
+    directions[np.abs(directions) < 1e-12] = 0.0
+    return directions
+
+
+def _slab(origin, direction, low, high):
+    """Entry/exit parameters of rays along one axis against [low, high]."""
+    parallel = direction == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t1 = (low - origin) / direction
+        t2 = (high - origin) / direction
+    inside = (origin >= low) & (origin <= high)
+    near = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t1, t2))
+    far = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t1, t2))
+    return near, far
+
+
+def batch_raycast(origins, directions, max_distance, rects):
+    """Cast R rays from each of N origins against K axis-aligned rectangles.
+
+    ``origins`` is (N, 2); ``directions`` holds unit vectors, either (R, 2)
+    shared by every origin or (N, R, 2); ``rects`` is (K, 4) as produced by
+    ``rect_array``, shared by every origin, or (N, K, 4) with each origin's
+    own rectangles (pad short rows with ``inf``, which nothing hits). A ray
+    hits where it enters a rectangle at a distance in ``(0, max_distance)``.
+
+    Returns ``(distances, points, normals)`` shaped (N, R), (N, R, 2) and
+    (N, R, 2). Misses have an infinite distance, NaN points and zero normals.
+    """
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+    directions = np.asarray(directions, dtype=np.float64)
+    n = len(origins)
+    if directions.ndim == 2:
+        directions = np.broadcast_to(directions, (n,) + directions.shape)
+    r = directions.shape[1]
+
+    distances = np.full((n, r), np.inf)
+    normals = np.zeros((n, r, 2))
+    rects = np.asarray(rects, dtype=np.float64)
+    if rects.ndim < 3:
+        rects = rects.reshape(1, -1, 4)
+    k = rects.shape[1]
+
+    if k and n and r:
+        step = max(1, CHUNK_ELEMENTS // (r * k))
+        for start in range(0, n, step):
+            stop = min(n, start + step)
+            # (1, 1, K) when shared, (chunk, 1, K) per origin
+            chunk = rects if len(rects) == 1 else rects[start:stop]
+            left, top, right, bottom = (chunk[:, None, :, i] for i in range(4))
+            ox = origins[start:stop, 0, None, None]
+            oy = origins[start:stop, 1, None, None]
+            dx = directions[start:stop, :, 0, None]
+            dy = directions[start:stop, :, 1, None]
+
+            near_x, far_x = _slab(ox, dx, left, right)
+            near_y, far_y = _slab(oy, dy, top, bottom)
+            t_min = np.maximum(near_x, near_y)
+            t_max = np.minimum(far_x, far_y)
+
+            hit = (t_min < t_max) & (t_min > 0) & (t_min < max_distance)
+            t_hit = np.where(hit, t_min, np.inf)
+            closest = t_hit.argmin(axis=2)
+            best = np.take_along_axis(t_hit, closest[..., None], axis=2)[..., 0]
+            distances[start:stop] = best
+
+            # The slab entered last decides which face was hit; ties go to x
+            x_face = np.take_along_axis(near_x >= near_y, closest[..., None], axis=2)[..., 0]
+            found = np.isfinite(best)
+            chunk_dx = directions[start:stop, :, 0]
+            chunk_dy = directions[start:stop, :, 1]
+            normals[start:stop, :, 0] = np.where(found & x_face, -np.sign(chunk_dx), 0.0)
+            normals[start:stop, :, 1] = np.where(found & ~x_face, -np.sign(chunk_dy), 0.0)
+
+    with np.errstate(invalid="ignore"):
+        points = origins[:, None, :] + directions * distances[..., None]
+    points[~np.isfinite(distances)] = np.nan
+    return distances, points, normals
@@ -0,0 +1,264 @@
+"""Trajectory recording to a growing ``.npy`` file, and a replay viewer for it.
+
+A recording is a float32 array of shape ``(steps, vehicles, len(FIELDS))``
+holding every vehicle's ``state()`` after every step, plus a JSON sidecar
+(``<file>.json``) naming the model, seed and timestep. Steps are written in
+chunks and the ``.npy`` header is rewritten in place, so a file is always
+loadable, even mid-run, with ``np.load(path, mmap_mode="r")``. Replay reads
+through that memory map; nothing is re-simulated.
+
+    python recording.py record V6 run.npy --steps 200000 --seed 3
+    python recording.py replay run.npy
+"""
+
+import argparse
+import importlib
+import json
+import os
+import struct
+
+import numpy as np
+import pygame
+
+from rendering import draw_text
+
+FIELDS = ("x", "y", "heading", "left_wheel", "right_wheel", "left_sensor", "right_sensor")
+HEADER_SIZE = 128  # Fixed, so the header can be rewritten as the step count grows
+DTYPE = np.dtype("<f4")
+
+
+def npy_header(shape):
+    """A version 1.0 ``.npy`` header for a C-ordered float32 array, padded to ``HEADER_SIZE``."""
+    magic = np.lib.format.magic(1, 0)
+    length = HEADER_SIZE - len(magic) - 2
+    text = f"{{'descr': '{DTYPE.str}', 'fortran_order': False, 'shape': {tuple(shape)!r}, }}"
+    return magic + struct.pack("<H", length) + (text.ljust(length - 1) + "\n").encode("latin1")
+
+
+def meta_path(path):
+    return path + ".json"
+
+
+class TrajectoryWriter:
+    """Streams ``(vehicles, len(FIELDS))`` state rows to ``path`` in chunks of ``chunk`` steps."""
+
+    def __init__(self, path, vehicles, chunk=1024, meta=None):
+        self.path = path
+        self.vehicles = vehicles
+        self.buffer = np.empty((chunk, vehicles, len(FIELDS)), dtype=DTYPE)
+        self.pending = 0
+        self.steps = 0
+        self.file = open(path, "wb")
+        self.file.write(npy_header((0, vehicles, len(FIELDS))))
+        self.file.flush()
+        with open(meta_path(path), "w") as f:
+            json.dump({**(meta or {}), "fields": FIELDS, "vehicles": vehicles}, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, states):
+        """Add one step of ``(vehicles, len(FIELDS))`` states."""
+        states = np.asarray(states, dtype=DTYPE)
+        if states.shape != self.buffer.shape[1:]:
+            raise ValueError(f"expected states of shape {self.buffer.shape[1:]}, got {states.shape}")
+        self.buffer[self.pending] = states
+        self.pending += 1
+        if self.pending == len(self.buffer):
+            self.flush()
+
+    def capture(self, world):
+        self.append([vehicle.state() for vehicle in world.vehicles])
+
+    def flush(self):
+        if self.pending:
+            self.file.write(self.buffer[:self.pending].tobytes())
+            self.steps += self.pending
+            self.pending = 0
+        self.file.seek(0)
+        self.file.write(npy_header((self.steps, self.vehicles, len(FIELDS))))
+        self.file.seek(0, os.SEEK_END)
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+def load(path):
+    """``(states, meta)``: the recording as a read-only memory map and its sidecar."""
+    with open(meta_path(path)) as f:
+        meta = json.load(f)
+    with open(path, "rb") as f:
+        np.lib.format.read_magic(f)
+        shape, _, _ = np.lib.format.read_array_header_1_0(f)
+    if shape[0] == 0:
+        return np.empty(shape, dtype=DTYPE), meta
+    return np.load(path, mmap_mode="r"), meta
+
+
+def record(model, path, steps, seed=None, chunk=1024):
+    """Run ``model``'s ``create_world(seed)`` headless for ``steps`` steps, recording every one."""
+    module = importlib.import_module(model)
+    world = module.create_world(seed)
+    dt = 1 / module.FPS
+    meta = {"model": model, "seed": seed, "dt": dt, "width": world.width, "height": world.height}
+    with TrajectoryWriter(path, len(world.vehicles), chunk, meta) as writer:
+        for _ in range(steps):
+            world.step(dt)
+            writer.capture(world)
+    return path
+
+
+def draw_scene(surface, module, world, font):
+    """The model's static scene: background, obstacles and lights, as its window shows them."""
+    name = module.__name__
+    if name == "V3":
+        module.draw_background(surface)
+    elif name == "V6":
+        module.draw_background(surface, world, font, font)
+    else:
+        module.draw_background(surface, world)
+    if name in ("V3", "V6"):
+        for light in world.lights:
+            light.render(surface)
+
+
+class Replay:
+    """Plays a recording back from its memory map with pause, seek and speed control.
+
+    SPACE pauses, LEFT/RIGHT seek one second (ten with SHIFT), UP/DOWN
+    double or halve the speed, HOME/END jump to either end and clicking
+    the bar along the bottom seeks there.
+    """
+
+    TRAIL = 120
+    BAR_HEIGHT = 8
+
+    def __init__(self, path, fps=60):
+        self.path = path
+        self.states, self.meta = load(path)
+        self.fps = fps
+        self.cursor = 0.0
+        self.speed = 1.0
+        self.paused = False
+
+    @property
+    def steps(self):
+        return len(self.states)
+
+    @property
+    def steps_per_frame(self):
+        """Recorded steps per drawn frame at 1x, so playback runs in real time."""
+        return 1 / (self.meta["dt"] * self.fps)
+
+    def seek(self, step):
+        self.cursor = min(max(0.0, float(step)), max(0, self.steps - 1))
+
+    def advance(self):
+        if not self.paused:
+            self.seek(self.cursor + self.speed * self.steps_per_frame)
+
+    def handle(self, event):
+        if event.type == pygame.KEYDOWN:
+            jump = 10 if event.mod & pygame.KMOD_SHIFT else 1
+            if event.key == pygame.K_SPACE:
+                self.paused = not self.paused
+            elif event.key == pygame.K_RIGHT:
+                self.seek(self.cursor + jump / self.meta["dt"])
+            elif event.key == pygame.K_LEFT:
+                self.seek(self.cursor - jump / self.meta["dt"])
+            elif event.key == pygame.K_UP:
+                self.speed = min(64.0, self.speed * 2)
+            elif event.key == pygame.K_DOWN:
+                self.speed = max(1 / 16, self.speed / 2)
+            elif event.key == pygame.K_HOME:
+                self.seek(0)
+            elif event.key == pygame.K_END:
+                self.seek(self.steps - 1)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            surface = pygame.display.get_surface()
+            if event.pos[1] >= surface.get_height() - self.BAR_HEIGHT * 2:
+                self.seek(event.pos[0] / surface.get_width() * self.steps)
+
+    def draw(self, surface, scene, font):
+        surface.blit(scene, (0, 0))
+        width, height = surface.get_size()
+        if self.steps:
+            step = int(self.cursor)
+            trail = np.asarray(self.states[max(0, step - self.TRAIL):step + 1, :, :3], dtype=np.float64)
+            max_jump = min(self.meta["width"], self.meta["height"]) / 2
+            for i in range(trail.shape[1]):
+                # Break the trail where the vehicle wrapped around the screen
+                points = trail[:, i, :2]
+                breaks = np.flatnonzero(np.abs(np.diff(points, axis=0)).max(axis=1, initial=0) >= max_jump) + 1
+                for run in np.split(points, breaks):
+                    if len(run) > 1:
+                        pygame.draw.lines(surface, (80, 160, 80), False, run.tolist(), 1)
+                x, y, heading = trail[-1, i].tolist()
+                pygame.draw.circle(surface, (100, 255, 100), (int(x), int(y)), 10)
+                tip = pygame.Vector2(x, y) + pygame.Vector2(0, -14).rotate(heading)
+                pygame.draw.line(surface, (255, 255, 255), (x, y), tip, 2)
+
+        time_s = self.cursor * self.meta["dt"]
+        status = f"{self.meta.get('model', '?')}  step {int(self.cursor)}/{self.steps}  t={time_s:.1f}s  x{self.speed:g}"
+        draw_text(surface, font, status + ("  [paused]" if self.paused else ""), (220, 220, 255), (10, 10), live=True)
+        draw_text(surface, font, "SPACE pause  LEFT/RIGHT seek  UP/DOWN speed  HOME/END", (160, 160, 200), (10, 32))
+        bar = pygame.Rect(0, height - self.BAR_HEIGHT, width, self.BAR_HEIGHT)
+        pygame.draw.rect(surface, (40, 40, 60), bar)
+        if self.steps:
+            pygame.draw.rect(surface, (120, 120, 220), (0, bar.top, int(width * (self.cursor + 1) / self.steps), bar.height))
+
+    def run(self):
+        pygame.init()
+        window = pygame.display.set_mode((int(self.meta["width"]), int(self.meta["height"])))
+        pygame.display.set_caption(f"Replay: {os.path.basename(self.path)}")
+        font = pygame.font.SysFont("Arial", 16)
+
+        scene = pygame.Surface(window.get_size())
+        if "model" in self.meta:
+            module = importlib.import_module(self.meta["model"])
+            draw_scene(scene, module, module.create_world(self.meta.get("seed")), font)
+
+        clock = pygame.time.Clock()
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    running = False
+                else:
+                    self.handle(event)
+            self.advance()
+            self.draw(window, scene, font)
+            pygame.display.flip()
+            clock.tick(self.fps)
+        pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="run a model headless and record it")
+    rec.add_argument("model", choices=("V1", "V2", "V3", "V4", "V6"))
+    rec.add_argument("path")
+    rec.add_argument("--steps", type=int, default=10_000)
+    rec.add_argument("--seed", type=int, default=0)
+    rec.add_argument("--chunk", type=int, default=1024, help="steps buffered per write")
+    play = commands.add_parser("replay", help="play a recording back")
+    play.add_argument("path")
+    play.add_argument("--fps", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        record(args.model, args.path, args.steps, args.seed, args.chunk)
+    else:
+        Replay(args.path, args.fps).run()
+
+
+if __name__ == "__main__":
+    main()
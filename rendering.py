@@ -0,0 +1,478 @@
+"""Drawing helpers that keep per-frame render cost flat as scenes grow."""
+
+import math
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+# Runs of a telemetry line that are drawn from a glyph atlas rather than cached
+NUMBER = re.compile(r"[-+]?\d+(?:\.\d+)?")
+NUMBER_GLYPHS = "0123456789.-+"
+
+
+class MemoryHeatmap:
+    """Collision memory drawn as one scaled blit of a grid-resolution surface.
+
+    Cell alphas are written straight into a ``cols`` x ``rows`` surface via
+    ``pygame.surfarray`` and scaled up to world size. The surface is only
+    rebuilt once some cell's alpha has moved by ``threshold`` or more.
+
+    With a ``camera`` (a ``camera.Camera``) only the cells in view are
+    scaled, to screen size, and ``surface`` is drawn at ``origin``; call
+    ``redraw()`` after the camera moves.
+    """
+
+    def __init__(self, collision_map, color=(255, 50, 50), threshold=4, min_danger=0.1, max_alpha=200, camera=None):
+        self.collision_map = collision_map
+        self.threshold = threshold
+        self.min_danger = min_danger
+        self.max_alpha = max_alpha
+        self.camera = camera
+        self.small = pygame.Surface((collision_map.cols, collision_map.rows), pygame.SRCALPHA)
+        self.small.fill(color + (0,))
+        self.surface = None
+        self.origin = (0, 0)
+        self.alpha = None
+        self.changed = []
+
+    def invalidate(self):
+        self.alpha = None
+
+    def alphas(self):
+        """(rows, cols) uint8 alpha per cell, as the old per-rect loop chose them."""
+        values = self.collision_map.values()
+        alpha = np.minimum(self.max_alpha, (values * 25).astype(np.int32))
+        alpha[values <= self.min_danger] = 0
+        return alpha.astype(np.uint8)
+
+    def update(self):
+        """Rebuild the scaled surface if the map changed enough; returns whether it did.
+
+        After a rebuild ``changed`` lists the rects (see ``cell_runs``) of the cells whose
+        alpha differs from the previous build, merged into runs per row.
+        """
+        alpha = self.alphas()
+        self.changed = []
+        if self.alpha is None:
+            differs = np.ones(alpha.shape, dtype=bool)
+        else:
+            delta = np.abs(alpha.astype(np.int16) - self.alpha)
+            if delta.max(initial=0) < self.threshold:
+                return False
+            differs = delta > 0
+        pixels = pygame.surfarray.pixels_alpha(self.small)
+        pixels[...] = alpha.T
+        del pixels  # Unlock the surface before scaling
+        self.alpha = alpha
+        self.redraw()
+        self.changed = self.cell_runs(differs)
+        return True
+
+    def visible_cells(self):
+        """``(col0, row0, col1, row1)``: the cells the camera sees, or all of them."""
+        memory = self.collision_map
+        if self.camera is None:
+            return 0, 0, memory.cols, memory.rows
+        left, top, right, bottom = self.camera.view()
+        size = memory.cell_size
+        col0, row0 = max(0, math.floor(left / size)), max(0, math.floor(top / size))
+        col1, row1 = min(memory.cols, math.ceil(right / size)), min(memory.rows, math.ceil(bottom / size))
+        return col0, row0, max(col0, col1), max(row0, row1)
+
+    def redraw(self):
+        """Rescale the cells in view from the grid-resolution surface."""
+        col0, row0, col1, row1 = self.visible_cells()
+        area = pygame.Rect(col0, row0, col1 - col0, row1 - row0)
+        size = self.collision_map.cell_size
+        world = pygame.Rect(area.left * size, area.top * size, area.width * size, area.height * size)
+        screen = world if self.camera is None else self.camera.rect_to_screen(world)
+        if self.surface is None or self.surface.get_size() != screen.size:
+            self.surface = pygame.Surface(screen.size, pygame.SRCALPHA)
+        pygame.transform.scale(self.small.subsurface(area), screen.size, self.surface)
+        self.origin = screen.topleft
+
+    def cell_runs(self, mask):
+        """Rects covering the true cells of ``mask``, one per horizontal run.
+
+        With a camera the rects are in screen space and runs out of view are dropped.
+        """
+        size = self.collision_map.cell_size
+        rects = []
+        for row in np.flatnonzero(mask.any(axis=1)):
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], mask[row].view(np.int8), [0]))))
+            for start, stop in zip(edges[::2], edges[1::2]):
+                rect = pygame.Rect(start * size, row * size, (stop - start) * size, size)
+                if self.camera is not None:
+                    rect = self.camera.rect_to_screen(rect)
+                    if not rect.colliderect(0, 0, self.camera.width, self.camera.height):
+                        continue
+                rects.append(rect)
+        return rects
+
+    def draw(self, surface, area=None):
+        """Blit the heatmap, or just the part under the screen rect ``area``."""
+        if area is None:
+            surface.blit(self.surface, self.origin)
+        else:
+            surface.blit(self.surface, area, area.move(-self.origin[0], -self.origin[1]))
+
+
+class TextCache:
+    """LRU of rendered text surfaces keyed by ``(font, text, color)``."""
+
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+class GlyphAtlas:
+    """Every glyph of ``charset`` pre-rendered side by side on one surface.
+
+    Numbers are assembled from glyph blits, so a value that changes every
+    frame never goes through ``font.render``.
+    """
+
+    def __init__(self, font, color, charset=NUMBER_GLYPHS):
+        glyphs = [(char, font.render(char, True, color)) for char in charset]
+        width = sum(glyph.get_width() for _, glyph in glyphs)
+        self.surface = pygame.Surface((max(1, width), font.get_height()), pygame.SRCALPHA)
+        self.areas = {}
+        x = 0
+        for char, glyph in glyphs:
+            self.surface.blit(glyph, (x, 0))
+            self.areas[char] = pygame.Rect(x, 0, glyph.get_width(), glyph.get_height())
+            x += glyph.get_width()
+
+    def compose(self, text):
+        """``text`` assembled from atlas glyphs onto a new surface."""
+        areas = [self.areas[char] for char in text]
+        surface = pygame.Surface((max(1, sum(area.width for area in areas)), self.surface.get_height()), pygame.SRCALPHA)
+        x = 0
+        for area in areas:
+            surface.blit(self.surface, (x, 0), area)
+            x += area.width
+        return surface
+
+
+class TextRenderer:
+    """Cached text drawing shared by labels, telemetry and vehicle name tags.
+
+    Static text goes through a ``TextCache``. ``live`` lines are split into
+    labels, which are cached the same way, and numbers, which are assembled
+    from a per-font ``GlyphAtlas`` into their own LRU so values that change
+    every frame never evict the labels.
+    """
+
+    def __init__(self, capacity=512, number_capacity=1024):
+        self.cache = TextCache(capacity)
+        self.numbers = OrderedDict()
+        self.number_capacity = number_capacity
+        self.atlases = {}
+
+    def render(self, font, text, color):
+        return self.cache.render(font, text, color)
+
+    def atlas(self, font, color):
+        atlas = self.atlases.get((font, color))
+        if atlas is None:
+            atlas = self.atlases[(font, color)] = GlyphAtlas(font, color)
+        return atlas
+
+    def number(self, font, text, color):
+        key = (font, text, color)
+        surface = self.numbers.get(key)
+        if surface is not None:
+            self.numbers.move_to_end(key)
+            return surface
+        surface = self.numbers[key] = self.atlas(font, color).compose(text)
+        if len(self.numbers) > self.number_capacity:
+            self.numbers.popitem(last=False)
+        return surface
+
+    def draw(self, surface, font, text, color, dest, live=False):
+        """Blit ``text`` with its top-left at ``dest``; returns the covered rect."""
+        if not live:
+            return surface.blit(self.render(font, text, color), dest)
+
+        x, y = dest
+        blits = []
+        start = 0
+        for match in NUMBER.finditer(text):
+            if match.start() > start:
+                label = self.render(font, text[start:match.start()], color)
+                blits.append((label, (x, y)))
+                x += label.get_width()
+            number = self.number(font, match.group(), color)
+            blits.append((number, (x, y)))
+            x += number.get_width()
+            start = match.end()
+        if start < len(text):
+            label = self.render(font, text[start:], color)
+            blits.append((label, (x, y)))
+            x += label.get_width()
+        surface.blits(blits, doreturn=False)
+        return pygame.Rect(dest, (x - dest[0], font.get_height()))
+
+
+class SpriteCache:
+    """Alpha sprites rendered once per distinct shape and reused every frame.
+
+    Callers quantise anything animated (e.g. a pulse phase) before asking,
+    so the cache stays a handful of surfaces instead of one per frame.
+    """
+
+    def __init__(self):
+        self.sprites = {}
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def circle(self, radius, color):
+        """A filled circle of ``radius`` centred on a transparent square."""
+        key = ("circle", radius, color)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            size = max(1, math.ceil(radius * 2))
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, color, (size / 2, size / 2), radius)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()
+            self.sprites[key] = sprite
+        return sprite
+
+    def panel(self, size, fill, border=None, border_width=2):
+        """A translucent ``fill`` rectangle of ``size``, optionally outlined, e.g. behind a debug readout."""
+        key = ("panel", size, fill, border, border_width)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface(size, pygame.SRCALPHA)
+            sprite.fill(fill)
+            if border is not None:
+                pygame.draw.rect(sprite, border, sprite.get_rect(), border_width)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()
+            self.sprites[key] = sprite
+        return sprite
+
+    def clear(self):
+        self.sprites.clear()
+
+
+class Compositor:
+    """Draws a frame as cached static layers plus dynamic layers on top.
+
+    Static layers (background fill, grids, fixed obstacles) are drawn once
+    into an off-screen surface that is blitted each frame; they are only
+    redrawn after ``invalidate()`` (e.g. on a theme change) or when the
+    target surface changes size. Layers are callables taking the surface.
+    """
+
+    def __init__(self):
+        self.static_layers = []
+        self.dynamic_layers = []
+        self.background = None
+
+    def add_static(self, draw):
+        self.static_layers.append(draw)
+        self.invalidate()
+        return draw
+
+    def add_dynamic(self, draw):
+        self.dynamic_layers.append(draw)
+        return draw
+
+    def invalidate(self):
+        self.background = None
+
+    def static_surface(self, size):
+        if self.background is None or self.background.get_size() != size:
+            self.background = pygame.Surface(size)
+            for draw in self.static_layers:
+                draw(self.background)
+            if pygame.display.get_surface() is not None:
+                self.background = self.background.convert()
+        return self.background
+
+    def render(self, surface):
+        surface.blit(self.static_surface(surface.get_size()), (0, 0))
+        for draw in self.dynamic_layers:
+            draw(surface)
+
+
+class DirtyRegions:
+    """Repaint only what dynamic drawing touched, from a cached scene.
+
+    Each frame: ``restore()`` copies the scene back over everything drawn
+    last frame (plus any ``extra`` areas where the scene itself changed),
+    the dynamic layers are drawn and ``add()`` their rects, then
+    ``present()`` pushes just those areas with ``pygame.display.update``.
+    """
+
+    def __init__(self, padding=2):
+        self.padding = padding
+        self.previous = []
+        self.restored = []
+        self.current = []
+        self.full = True
+
+    def invalidate(self):
+        """Repaint and flip the whole screen next frame."""
+        self.full = True
+
+    def add(self, rects):
+        if rects is None:
+            return
+        if isinstance(rects, pygame.Rect):
+            rects = (rects,)
+        for rect in rects:
+            if rect is not None and rect.width and rect.height:
+                self.current.append(rect.inflate(self.padding * 2, self.padding * 2))
+
+    def restore(self, surface, scene, extra=()):
+        if self.full:
+            surface.blit(scene, (0, 0))
+            self.restored = []
+            return
+        self.restored = self.previous + list(extra)
+        surface.blits([(scene, rect, rect) for rect in self.restored], doreturn=False)
+
+    def present(self):
+        if self.full:
+            pygame.display.flip()
+            self.full = False
+        else:
+            pygame.display.update(self.restored + self.current)
+        self.previous, self.current = self.current, []
+
+
+class DetailLevel:
+    """Picks how much of each vehicle to draw, from how many are on screen and how long frames take.
+
+    Tiers run from ``FULL`` (every debug visual) through ``BODY`` (body and
+    heading only) to ``POINTS`` (one batched dot per vehicle). The count
+    sets the starting tier: more than ``body_above`` vehicles drop to
+    ``BODY``, more than ``points_above`` to ``POINTS``. Frame times then
+    nudge it: once the smoothed frame time has been over ``budget_ms`` for
+    ``patience`` frames in a row the tier drops one more level, and it
+    climbs back after as long under ``recover`` x the budget, so it does
+    not flicker between two tiers. ``cycle()`` pins a tier for debugging.
+    """
+
+    FULL, BODY, POINTS = range(3)
+    NAMES = ("full", "body", "points")
+
+    def __init__(self, body_above=25, points_above=400, budget_ms=1000 / 60, patience=30, recover=0.5, smoothing=0.1):
+        self.body_above = body_above
+        self.points_above = points_above
+        self.budget_ms = budget_ms
+        self.patience = patience
+        self.recover = recover
+        self.smoothing = smoothing
+        self.frame_ms = None
+        self.penalty = 0  # Levels dropped for slow frames
+        self.streak = 0  # Consecutive frames over (positive) or well under (negative) budget
+        self.forced = None
+        self.tier = self.FULL
+
+    def for_count(self, count):
+        if count > self.points_above:
+            return self.POINTS
+        if count > self.body_above:
+            return self.BODY
+        return self.FULL
+
+    def choose(self, count, frame_ms=None):
+        """The tier for drawing ``count`` vehicles, given the last frame's work time."""
+        if frame_ms is not None:
+            self.frame_ms = frame_ms if self.frame_ms is None else self.frame_ms + (frame_ms - self.frame_ms) * self.smoothing
+            if self.frame_ms > self.budget_ms:
+                self.streak = max(1, self.streak + 1)
+            elif self.frame_ms < self.budget_ms * self.recover:
+                self.streak = min(-1, self.streak - 1)
+            else:
+                self.streak = 0
+            if abs(self.streak) >= self.patience:
+                # Step, then start afresh so the new tier gets a full window to settle
+                self.penalty = min(self.POINTS, max(0, self.penalty + (1 if self.streak > 0 else -1)))
+                self.streak = 0
+                self.frame_ms = None
+        if self.forced is not None:
+            self.tier = self.forced
+        else:
+            self.tier = min(self.POINTS, self.for_count(count) + self.penalty)
+        return self.tier
+
+    def cycle(self):
+        """Step the pinned tier: automatic, full, body, points, automatic..."""
+        self.forced = self.FULL if self.forced is None else self.forced + 1
+        if self.forced > self.POINTS:
+            self.forced = None
+
+    @property
+    def name(self):
+        return self.NAMES[self.tier] + (" (pinned)" if self.forced is not None else "")
+
+
+def blit_centered(surface, sprite, center):
+    return surface.blit(sprite, sprite.get_rect(center=(int(center[0]), int(center[1]))))
+
+
+def draw_points(surface, points, colors, size=3):
+    """Draw ``size`` x ``size`` dots at (N, 2) screen ``points`` in one array write.
+
+    ``colors`` is one RGB colour or one per point. Returns the rect covering
+    every dot, or None if none landed on the surface.
+    """
+    width, height = surface.get_size()
+    corners = np.floor(np.asarray(points, dtype=np.float64).reshape(-1, 2) - (size - 1) / 2).astype(np.int64)
+    inside = ((corners[:, 0] > -size) & (corners[:, 0] < width) & (corners[:, 1] > -size) & (corners[:, 1] < height))
+    if not inside.any():
+        return None
+    corners = corners[inside]
+    colors = np.asarray(colors, dtype=np.uint8)
+    if colors.ndim == 2:
+        colors = colors[inside]
+    pixels = pygame.surfarray.pixels3d(surface)
+    for dx in range(size):
+        for dy in range(size):
+            x, y = corners[:, 0] + dx, corners[:, 1] + dy
+            on = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+            pixels[x[on], y[on]] = colors if colors.ndim == 1 else colors[on]
+    del pixels  # Unlock the surface
+    left, top = np.maximum(corners.min(axis=0), 0)
+    right, bottom = np.minimum(corners.max(axis=0) + size, (width, height))
+    return pygame.Rect(int(left), int(top), int(right - left), int(bottom - top))
+
+
+# Shared by every script so name tags and panels hit the same cache
+text_renderer = TextRenderer()
+sprites = SpriteCache()
+
+
+def render_text(font, text, color):
+    """Cached ``font.render(text, True, color)``."""
+    return text_renderer.render(font, text, color)
+
+
+def draw_text(surface, font, text, color, dest, live=False):
+    return text_renderer.draw(surface, font, text, color, dest, live)
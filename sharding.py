@@ -0,0 +1,347 @@
+"""One large V6 world split into tiles, each stepped by its own process.
+
+Every worker builds its slice of the world from the seed: the obstacles
+and light field within ``SLICE_MARGIN`` of its tile, the bots inside it
+and a copy of the collision memory grid (one float per 40x40 cell, small
+next to the light field). It steps them as ``MemoryWorld.step`` would. Between moving and
+sharing memory each worker sends every neighbouring tile one message:
+
+- halo: positions of its bots within ``MEMORY_SHARING_DISTANCE`` of that
+  tile, which count as neighbours there but are not stepped there;
+- border cells: its collision-memory cells that tile's bots or halo can
+  read;
+- migrants: bots that moved into that tile, handed over whole;
+- collisions its bots recorded in cells that tile owns;
+
+then waits for the same from each of them before sharing. Tiles are
+aligned to memory cells, so every cell has exactly one owner. Workers
+talk to each other directly; the parent only starts them, asks for a
+number of steps and collects states.
+
+Sharding does not yet pay for itself: every step each worker pickles and
+waits on a message per neighbour, and that costs more than the stepping
+it saves. Measured on one machine, 2x2 tiles at scale 4 ran 37 steps/s
+against 53 for one process, and 4x2 at scale 10 ran 4.4 against 7.6.
+Use it to spread a world too large for one process's memory, not for
+speed.
+
+    python sharding.py --tiles 4x2 --scale 10 --steps 500
+    python sharding.py --tiles 2x2 --scale 4 --steps 300 --verify
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+from bisect import bisect_right
+from collections import namedtuple
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+import V6
+from collision_memory import CollisionMemory
+
+# How far past its tile a bot's rays, eyes and one step's move reach
+SLICE_MARGIN = V6.RAY_LENGTH + 30
+POLL_SECONDS = 1.0  # How often a waiting parent checks that its workers are still alive
+
+# One step's traffic from ``sender`` to a neighbouring tile
+Exchange = namedtuple("Exchange", "step sender halo cells values migrants collisions")
+
+
+class Layout:
+    """A ``cols`` x ``rows`` grid of tiles over a world, with edges on memory cell boundaries."""
+
+    def __init__(self, width, height, cols, rows, cell_size=V6.GRID_SIZE):
+        self.width = width
+        self.height = height
+        self.cols = cols
+        self.rows = rows
+        self.cell_size = cell_size
+        grid_cols, grid_rows = width // cell_size, height // cell_size
+        if cols > grid_cols or rows > grid_rows:
+            raise ValueError(f"{cols}x{rows} tiles do not fit a {grid_cols}x{grid_rows} cell grid")
+        self.x_edges = [round(i * grid_cols / cols) * cell_size for i in range(cols)] + [width]
+        self.y_edges = [round(i * grid_rows / rows) * cell_size for i in range(rows)] + [height]
+
+    def __len__(self):
+        return self.cols * self.rows
+
+    def owner(self, position):
+        """Index of the tile containing a world position (clamped into the world)."""
+        col = min(max(bisect_right(self.x_edges, position[0]) - 1, 0), self.cols - 1)
+        row = min(max(bisect_right(self.y_edges, position[1]) - 1, 0), self.rows - 1)
+        return row * self.cols + col
+
+    def bounds(self, index):
+        """``(left, top, right, bottom)`` of a tile."""
+        row, col = divmod(index, self.cols)
+        return self.x_edges[col], self.y_edges[row], self.x_edges[col + 1], self.y_edges[row + 1]
+
+    def neighbors(self, index):
+        """Tiles around ``index``, wrapping like the world does, so migrants always land on one."""
+        row, col = divmod(index, self.cols)
+        found = {((row + dy) % self.rows) * self.cols + (col + dx) % self.cols
+                 for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+        found.discard(index)
+        return sorted(found)
+
+    def region(self, index, margin):
+        """A tile's bounds grown by ``margin`` on every side."""
+        left, top, right, bottom = self.bounds(index)
+        return left - margin, top - margin, right + margin, bottom + margin
+
+    def cells(self, index):
+        """``(col0, row0, col1, row1)`` memory cells a tile owns."""
+        left, top, right, bottom = self.bounds(index)
+        size = self.cell_size
+        return left // size, top // size, math.ceil(right / size), math.ceil(bottom / size)
+
+    def border_cells(self, index, neighbor, reach):
+        """Flat indices of the cells ``index`` owns within ``reach`` of tile ``neighbor``."""
+        col0, row0, col1, row1 = self.cells(index)
+        left, top, right, bottom = self.bounds(neighbor)
+        size = self.cell_size
+        grid_cols = self.width // size
+        cols = np.arange(col0, col1)
+        rows = np.arange(row0, row1)
+        # Gap between each cell and the neighbour tile along each axis
+        gap_x = np.maximum(0, np.maximum(left - (cols + 1) * size, cols * size - right))
+        gap_y = np.maximum(0, np.maximum(top - (rows + 1) * size, rows * size - bottom))
+        near = np.hypot(gap_x[None, :], gap_y[:, None]) <= reach
+        r, c = np.nonzero(near)
+        return (rows[r] * grid_cols + cols[c]).astype(np.int64)
+
+
+def box_distance(points, box):
+    """Distance from each of (N, 2) ``points`` to a ``(left, top, right, bottom)`` box."""
+    left, top, right, bottom = box
+    dx = np.maximum(0, np.maximum(left - points[:, 0], points[:, 0] - right))
+    dy = np.maximum(0, np.maximum(top - points[:, 1], points[:, 1] - bottom))
+    return np.hypot(dx, dy)
+
+
+class TileMemory(CollisionMemory):
+    """A worker's copy of the collision memory; writes to cells it does not own are set aside.
+
+    Those writes (a bot colliding just over the border) are sent to the
+    owning tile in ``collisions`` and applied there.
+    """
+
+    def __init__(self, cols, rows, cell_size, owned):
+        super().__init__(cols, rows, cell_size)
+        self.owned = owned
+        self.collisions = []
+
+    def owns(self, grid_x, grid_y):
+        col0, row0, col1, row1 = self.owned
+        return col0 <= grid_x < col1 and row0 <= grid_y < row1
+
+    def add(self, grid_x, grid_y, amount, limit=None):
+        if self.owns(grid_x, grid_y):
+            super().add(grid_x, grid_y, amount, limit)
+        else:
+            self.collisions.append((grid_x, grid_y, amount, limit))
+
+
+class Tile:
+    """The part of the world one worker owns, and its side of the halo exchange."""
+
+    def __init__(self, index, layout, world, inboxes):
+        self.index = index
+        self.layout = layout
+        self.world = world
+        self.inboxes = inboxes
+        self.neighbors = layout.neighbors(index)
+        self.boxes = {n: layout.bounds(n) for n in self.neighbors}
+        self.border = {n: layout.border_cells(index, n, V6.MEMORY_SHARING_DISTANCE + layout.cell_size)
+                       for n in self.neighbors}
+        self.pending = {}
+        self.steps = 0
+
+        memory = world.collision_map
+        world.collision_map = TileMemory(memory.cols, memory.rows, memory.cell_size, layout.cells(index))
+        world.vehicles = [bot for bot in world.vehicles if layout.owner(bot.position) == index]
+
+    def step(self, dt):
+        world = self.world
+        world.move(dt)
+
+        # Sort bots into those staying and those handed to a neighbour
+        staying = []
+        migrants = {n: [] for n in self.neighbors}
+        destination = np.empty(len(world.vehicles), dtype=np.int64)
+        for i, bot in enumerate(world.vehicles):
+            destination[i] = owner = self.layout.owner(bot.position)
+            if owner == self.index:
+                staying.append(bot)
+            else:
+                migrants[owner].append(bot)
+        positions = world.positions()
+
+        collisions = {n: [] for n in self.neighbors}
+        for grid_x, grid_y, amount, limit in world.collision_map.collisions:
+            owner = self.layout.owner(((grid_x + 0.5) * self.layout.cell_size, (grid_y + 0.5) * self.layout.cell_size))
+            collisions[owner].append((grid_x, grid_y, amount, limit))
+        world.collision_map.collisions = []
+
+        for n in self.neighbors:
+            near = (box_distance(positions, self.boxes[n]) <= V6.MEMORY_SHARING_DISTANCE) & (destination != n)
+            cells = self.border[n]
+            self.inboxes[n].put(Exchange(self.steps, self.index, positions[near], cells,
+                                         world.collision_map.gather(cells), migrants[n], collisions[n]))
+
+        # Bots that left stay visible here as halo until their new owner shares them back
+        halo = [positions[destination != self.index]]
+        arrivals = []
+        for message in self.receive():
+            world.collision_map.scatter(message.cells, message.values)
+            for grid_x, grid_y, amount, limit in message.collisions:
+                world.collision_map.add(grid_x, grid_y, amount, limit)
+            halo.append(message.halo)
+            arrivals.extend(message.migrants)
+
+        world.vehicles = sorted(staying + arrivals, key=lambda bot: bot.index)
+        world.share(np.concatenate(halo))
+        self.steps += 1
+
+    def receive(self):
+        """This step's message from every neighbour; faster neighbours' later steps are kept for later."""
+        inbox = self.inboxes[self.index]
+        while len(self.pending.get(self.steps, ())) < len(self.neighbors):
+            message = inbox.get()
+            self.pending.setdefault(message.step, []).append(message)
+        return sorted(self.pending.pop(self.steps, []), key=lambda message: message.sender)
+
+
+def worker(index, layout, seed, scale, inboxes, commands, results):
+    try:
+        world = V6.create_world(seed, scale=scale, region=layout.region(index, SLICE_MARGIN))
+        tile = Tile(index, layout, world, inboxes)
+        dt = 1 / V6.FPS
+        while True:
+            command, argument = commands.get()
+            if command == "step":
+                for _ in range(argument):
+                    tile.step(dt)
+                results.put((index, len(world.vehicles)))
+            elif command == "states":
+                results.put((index, [(bot.index, bot.state()) for bot in world.vehicles]))
+            else:
+                break
+    except Exception:
+        # Handed to the parent, which stops the other tiles waiting on this one
+        results.put((index, RuntimeError(f"tile {index} failed:\n{traceback.format_exc()}")))
+
+
+class ShardedWorld:
+    """``V6.create_world(seed, scale=scale)`` stepped by one process per tile of a ``tiles`` grid."""
+
+    def __init__(self, tiles=(2, 2), seed=None, scale=1):
+        self.seed = seed
+        self.scale = scale
+        self.layout = Layout(V6.SCREEN_WIDTH * scale, V6.SCREEN_HEIGHT * scale, *tiles)
+        self.inboxes = [multiprocessing.Queue() for _ in range(len(self.layout))]
+        self.commands = [multiprocessing.Queue() for _ in range(len(self.layout))]
+        self.results = multiprocessing.Queue()
+        self.workers = [multiprocessing.Process(target=worker, daemon=True,
+                                                args=(i, self.layout, seed, scale, self.inboxes, self.commands[i], self.results))
+                        for i in range(len(self.layout))]
+        for process in self.workers:
+            process.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ask(self, command, argument=None):
+        """Send every worker a command and collect their replies in tile order.
+
+        Raises ``RuntimeError`` if a worker fails or dies before replying;
+        the remaining workers are terminated first, since they would wait on
+        it forever.
+        """
+        for commands in self.commands:
+            commands.put((command, argument))
+        replies = {}
+        while len(replies) < len(self.workers):
+            try:
+                index, reply = self.results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                dead = [i for i in range(len(self.workers)) if i not in replies and not self.workers[i].is_alive()]
+                if dead:
+                    self.terminate()
+                    raise RuntimeError(f"tile {dead[0]} worker exited with code {self.workers[dead[0]].exitcode}") from None
+                continue
+            if isinstance(reply, Exception):
+                self.terminate()
+                raise reply
+            replies[index] = reply
+        return [replies[i] for i in range(len(self.workers))]
+
+    def step(self, steps=1):
+        """Run ``steps`` steps on every tile; returns how many bots each tile owns."""
+        return self.ask("step", steps)
+
+    def states(self):
+        """Every bot's ``state()``, as an (N, len(FIELDS)) array ordered by bot index."""
+        rows = sorted(row for tile in self.ask("states") for row in tile)
+        return np.array([state for _, state in rows], dtype=np.float64)
+
+    def terminate(self):
+        for process in self.workers:
+            if process.is_alive():
+                process.terminate()
+        for process in self.workers:
+            process.join()
+
+    def close(self):
+        for commands in self.commands:
+            commands.put(("stop", None))
+        for process in self.workers:
+            process.join()
+
+
+def parse_tiles(text):
+    cols, _, rows = text.partition("x")
+    return int(cols), int(rows or 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tiles", type=parse_tiles, default=(2, 2), metavar="COLSxROWS")
+    parser.add_argument("--scale", type=int, default=4, help="world size in screens along each side")
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verify", action="store_true", help="compare against one process stepping the same world")
+    args = parser.parse_args(argv)
+
+    with ShardedWorld(args.tiles, args.seed, args.scale) as sharded:
+        sharded.step(0)  # Wait until every worker has built its world
+        start = time.perf_counter()
+        counts = sharded.step(args.steps)
+        elapsed = time.perf_counter() - start
+        states = sharded.states()
+    print(f"{len(states)} bots on {args.tiles[0]}x{args.tiles[1]} tiles: {args.steps / elapsed:.1f} steps/s "
+          f"(bots per tile: {', '.join(map(str, counts))})")
+
+    if args.verify:
+        world = V6.create_world(args.seed, scale=args.scale)
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            world.step(1 / V6.FPS)
+        elapsed = time.perf_counter() - start
+        single = np.array([bot.state() for bot in world.vehicles])
+        print(f"one process: {args.steps / elapsed:.1f} steps/s; "
+              f"largest position difference {np.abs(single[:, :2] - states[:, :2]).max():.3g}")
+
+
+if __name__ == "__main__":
+    main()
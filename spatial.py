@@ -0,0 +1,235 @@
+"""Uniform-grid spatial indexes so queries only touch nearby obstacles or vehicles."""
+
+import math
+from collections import defaultdict
+
+import numpy as np
+
+CELL_SIZE = 64
+
+
+def is_circle(obstacle):
+    """Circles carry ``position`` and ``radius``; everything else is a ``pygame.Rect``."""
+    return hasattr(obstacle, "radius")
+
+
+def bounding_box(obstacle):
+    """(left, top, right, bottom) of a circle or rect obstacle."""
+    if is_circle(obstacle):
+        x, y, r = obstacle.position.x, obstacle.position.y, obstacle.radius
+        return x - r, y - r, x + r, y + r
+    return obstacle.left, obstacle.top, obstacle.right, obstacle.bottom
+
+
+class ObstacleGrid:
+    """Static rect and circle obstacles bucketed into square cells.
+
+    Each obstacle is listed in every cell its bounding box touches, so a
+    query only looks at the cells it covers. Results keep the obstacles'
+    original order. Rebuild the grid if the obstacle list changes.
+    """
+
+    def __init__(self, obstacles, cell_size=CELL_SIZE):
+        self.obstacles = list(obstacles)
+        self.cell_size = cell_size
+        self.boxes = np.array([bounding_box(obs) for obs in self.obstacles], dtype=np.float64).reshape(-1, 4)
+        self.cells = defaultdict(list)
+        for i, (left, top, right, bottom) in enumerate(self.boxes):
+            for cell in self._cells_over(left, top, right, bottom):
+                self.cells[cell].append(i)
+        self._pack_cells()
+
+    def _pack_cells(self):
+        """Lay the buckets out densely (CSR) so many boxes can be queried with array ops."""
+        if not self.cells:
+            self.origin = np.zeros(2, dtype=np.int64)
+            self.shape = np.zeros(2, dtype=np.int64)
+            self.starts = self.counts = self.members = np.zeros(0, dtype=np.int64)
+            return
+        keys = np.array(list(self.cells), dtype=np.int64)
+        self.origin = keys.min(axis=0)
+        self.shape = keys.max(axis=0) - self.origin + 1
+        flat = (keys[:, 0] - self.origin[0]) * self.shape[1] + keys[:, 1] - self.origin[1]
+        self.counts = np.zeros(self.shape[0] * self.shape[1], dtype=np.int64)
+        self.counts[flat] = [len(bucket) for bucket in self.cells.values()]
+        self.starts = np.zeros_like(self.counts)
+        order = np.argsort(flat)
+        self.starts[flat[order]] = np.concatenate(([0], np.cumsum(self.counts[flat[order]])[:-1]))
+        self.members = np.concatenate([np.asarray(self.cells[tuple(key)], dtype=np.int64) for key in keys[order]])
+
+    def __len__(self):
+        return len(self.obstacles)
+
+    def _cells_over(self, left, top, right, bottom):
+        size = self.cell_size
+        for cx in range(math.floor(left / size), math.floor(right / size) + 1):
+            for cy in range(math.floor(top / size), math.floor(bottom / size) + 1):
+                yield cx, cy
+
+    def candidates(self, left, top, right, bottom):
+        """Sorted indices of obstacles whose cells overlap the given box."""
+        cells = self.cells
+        if len(cells) == 0:
+            return []
+        found = set()
+        for cell in self._cells_over(left, top, right, bottom):
+            bucket = cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return sorted(found)
+
+    def candidates_around(self, points, radius):
+        """Obstacles near each of (N, 2) ``points``, as one padded (N, K) index array.
+
+        Row ``i`` lists, in ascending order, the obstacles ``candidates``
+        would return for the box ``radius`` around point ``i``; shorter rows
+        are padded with ``len(self)``, one past the last obstacle. Every
+        point is handled with array operations, no Python loop per point.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        n = len(points)
+        pad = len(self.obstacles)
+        if n == 0 or len(self.members) == 0:
+            return np.full((n, 0), pad, dtype=np.int64)
+
+        # Every point looks at the same w x w block of cells around its own
+        low = np.floor((points - radius) / self.cell_size).astype(np.int64) - self.origin
+        high = np.floor((points + radius) / self.cell_size).astype(np.int64) - self.origin
+        width = int((high - low).max()) + 1
+        offsets = np.arange(width)
+        cx = low[:, 0, None, None] + offsets[None, :, None]
+        cy = low[:, 1, None, None] + offsets[None, None, :]
+        valid = ((cx <= high[:, 0, None, None]) & (cy <= high[:, 1, None, None])
+                 & (cx >= 0) & (cy >= 0) & (cx < self.shape[0]) & (cy < self.shape[1]))
+        flat = np.where(valid, cx * self.shape[1] + cy, 0).reshape(n, -1)
+        counts = np.where(valid.reshape(n, -1), self.counts[flat], 0)
+
+        # Concatenate the buckets of each point's cells, then spread them into rows
+        lengths = counts.ravel()
+        total = int(lengths.sum())
+        if total == 0:
+            return np.full((n, 0), pad, dtype=np.int64)
+        ends = np.cumsum(lengths)
+        found = self.members[np.repeat(self.starts[flat.ravel()] - ends + lengths, lengths) + np.arange(total)]
+        per_point = counts.sum(axis=1)
+        owner = np.repeat(np.arange(n), per_point)
+        column = np.arange(total) - np.repeat(np.cumsum(per_point) - per_point, per_point)
+        rows = np.full((n, int(per_point.max())), pad, dtype=np.int64)
+        rows[owner, column] = found
+
+        # An obstacle spanning several cells is listed once per cell
+        rows.sort(axis=1)
+        rows[:, 1:][rows[:, 1:] == rows[:, :-1]] = pad
+        rows.sort(axis=1)
+        return rows[:, :int((rows < pad).sum(axis=1).max())]
+
+    def nearby(self, point, radius):
+        """Obstacles that might lie within ``radius`` of ``point``; callers apply the exact test."""
+        x, y = point
+        return [self.obstacles[i] for i in self.candidates(x - radius, y - radius, x + radius, y + radius)]
+
+    def within(self, point, radius):
+        """Obstacles whose surface is at most ``radius`` from ``point``."""
+        x, y = point
+        found = []
+        for i in self.candidates(x - radius, y - radius, x + radius, y + radius):
+            obs = self.obstacles[i]
+            if is_circle(obs):
+                distance = math.hypot(x - obs.position.x, y - obs.position.y) - obs.radius
+            else:
+                left, top, right, bottom = self.boxes[i]
+                distance = math.hypot(max(left - x, 0, x - right), max(top - y, 0, y - bottom))
+            if distance <= radius:
+                found.append(obs)
+        return found
+
+    def at_point(self, point):
+        """Obstacles containing ``point`` (``pygame.Rect.collidepoint`` rules for rects)."""
+        x, y = point
+        bucket = self.cells.get((math.floor(x / self.cell_size), math.floor(y / self.cell_size)), ())
+        found = []
+        for i in bucket:
+            obs = self.obstacles[i]
+            if is_circle(obs):
+                if math.hypot(x - obs.position.x, y - obs.position.y) < obs.radius:
+                    found.append(obs)
+            else:
+                left, top, right, bottom = self.boxes[i]
+                if left <= x < right and top <= y < bottom:
+                    found.append(obs)
+        return found
+
+    def collides(self, point):
+        return bool(self.at_point(point))
+
+
+class NeighborGrid:
+    """Cell list over moving points with cells as wide as the query radius.
+
+    Build one per step from every vehicle's position; ``pairs()`` then finds
+    all neighbours at once by only comparing points in adjacent cells.
+    """
+
+    def __init__(self, points, radius):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.radius = radius
+        self.buckets = {}
+        if len(self.points) == 0:
+            return
+        cells = np.floor(self.points / radius).astype(np.int64)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        boundaries = np.flatnonzero(np.any(np.diff(cells[order], axis=0), axis=1)) + 1
+        for members in np.split(order, boundaries):
+            self.buckets[tuple(cells[members[0]])] = members
+
+    def _around(self, cx, cy):
+        found = [self.buckets.get((cx + ox, cy + oy)) for ox in (-1, 0, 1) for oy in (-1, 0, 1)]
+        return np.concatenate([members for members in found if members is not None])
+
+    def query(self, point):
+        """Indices of points closer than ``radius`` to ``point``."""
+        x, y = point
+        cx, cy = math.floor(x / self.radius), math.floor(y / self.radius)
+        if not self.buckets:
+            return np.empty(0, dtype=np.int64)
+        others = self._around(cx, cy)
+        offset = self.points[others] - (x, y)
+        return np.sort(others[np.einsum("ij,ij->i", offset, offset) < self.radius ** 2])
+
+    def in_box(self, left, top, right, bottom):
+        """Sorted indices of points inside the box, edges included (e.g. those on screen)."""
+        if not self.buckets:
+            return np.empty(0, dtype=np.int64)
+        size = self.radius
+        x0, x1 = math.floor(left / size), math.floor(right / size)
+        y0, y1 = math.floor(top / size), math.floor(bottom / size)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(self.buckets):
+            found = [self.buckets.get((cx, cy)) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+            found = [members for members in found if members is not None]
+        else:
+            # A box wider than the occupied cells is cheaper to test bucket by bucket
+            found = [members for (cx, cy), members in self.buckets.items() if x0 <= cx <= x1 and y0 <= cy <= y1]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        members = np.concatenate(found)
+        x, y = self.points[members, 0], self.points[members, 1]
+        return np.sort(members[(x >= left) & (x <= right) & (y >= top) & (y <= bottom)])
+
+    def pairs(self):
+        """Ordered pairs ``(i, j)``, ``i != j``, closer than ``radius``, sorted by ``i`` then ``j``."""
+        rows, cols = [], []
+        limit = self.radius ** 2
+        for (cx, cy), members in self.buckets.items():
+            others = self._around(cx, cy)
+            offset = self.points[members][:, None, :] - self.points[others][None, :, :]
+            close = np.einsum("ijk,ijk->ij", offset, offset) < limit
+            close &= members[:, None] != others[None, :]
+            ii, jj = np.nonzero(close)
+            rows.append(members[ii])
+            cols.append(others[jj])
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        order = np.lexsort((cols, rows))
+        return rows[order], cols[order]
@@ -0,0 +1,116 @@
+"""Struct-of-arrays engines that step many vehicles at once with NumPy."""
+
+import numpy as np
+
+from V3 import FPS, LIGHT_RESPONSE, BraitenbergVehicle3
+
+
+def light_positions(lights):
+    """Stack the ``location`` of every light into an (M, 2) float array."""
+    return np.array([(light.location.x, light.location.y) for light in lights], dtype=np.float64).reshape(-1, 2)
+
+
+class SwarmV3:
+    """N crossed-wiring vehicles (``BraitenbergVehicle3``) held in NumPy arrays.
+
+    Every step senses all N vehicles against all M lights with a single
+    (N, M) broadcast instead of one ``get_light_intensity`` call per eye per
+    light. Headings are in degrees with the same convention as
+    ``pygame.Vector2(0, -1).rotate(heading)``.
+    """
+
+    def __init__(self, positions, headings, turn_sensitivity=12, speed_multiplier=2.5,
+                 wander_strength=1.2, sensor_distance=35, sensor_gap=15, seed=None):
+        self.positions = np.array(positions, dtype=np.float64).reshape(-1, 2)
+        n = len(self.positions)
+        self.headings = np.broadcast_to(np.asarray(headings, dtype=np.float64), (n,)).copy()
+        self.turn_sensitivity = np.full(n, turn_sensitivity, dtype=np.float64)
+        self.speed_multiplier = np.full(n, speed_multiplier, dtype=np.float64)
+        self.wander_strength = np.full(n, wander_strength, dtype=np.float64)
+        self.sensor_distance = sensor_distance
+        self.sensor_gap = sensor_gap
+        self.rng = np.random.default_rng(seed)
+
+        self.left_eyes = np.zeros((n, 2))
+        self.right_eyes = np.zeros((n, 2))
+        self.left_sensor = np.zeros(n)
+        self.right_sensor = np.zeros(n)
+        self.speed = np.zeros(n)
+        self.turn_rate = np.zeros(n)
+
+    @classmethod
+    def random(cls, n, width, height, seed=None, **kwargs):
+        """Scatter ``n`` vehicles uniformly over a ``width`` x ``height`` world."""
+        rng = np.random.default_rng(seed)
+        positions = rng.uniform((0, 0), (width, height), size=(n, 2))
+        headings = rng.uniform(0, 360, size=n)
+        return cls(positions, headings, seed=rng.integers(2**32), **kwargs)
+
+    @classmethod
+    def from_vehicles(cls, vehicles, seed=None):
+        """Copy the state and tunables of existing ``BraitenbergVehicle3`` objects."""
+        swarm = cls([(v.position.x, v.position.y) for v in vehicles], [v.heading for v in vehicles], seed=seed)
+        swarm.turn_sensitivity[:] = [v.turn_sensitivity for v in vehicles]
+        swarm.speed_multiplier[:] = [v.speed_multiplier for v in vehicles]
+        swarm.wander_strength[:] = [v.wander_strength for v in vehicles]
+        return swarm
+
+    def __len__(self):
+        return len(self.positions)
+
+    def forward(self):
+        """Unit forward vectors, (N, 2)."""
+        radians = np.radians(self.headings)
+        return np.stack((np.sin(radians), -np.cos(radians)), axis=1)
+
+    def update_sensors(self):
+        forward = self.forward()
+        left = np.stack((-forward[:, 1], forward[:, 0]), axis=1)
+        ahead = self.positions + forward * self.sensor_distance
+        self.left_eyes = ahead + left * self.sensor_gap
+        self.right_eyes = ahead - left * self.sensor_gap
+
+    @staticmethod
+    def light_intensity(eyes, lights):
+        """Summed ``LIGHT_RESPONSE`` of (M, 2) ``lights`` at (N, 2) ``eyes``."""
+        if len(lights) == 0:
+            return np.zeros(len(eyes))
+        offset = eyes[:, None, :] - lights[None, :, :]
+        distance_sq = np.einsum("nmk,nmk->nm", offset, offset)
+        return LIGHT_RESPONSE.many(distance_sq).sum(axis=1)
+
+    def sense(self, lights):
+        self.update_sensors()
+        self.left_sensor = self.light_intensity(self.left_eyes, lights)
+        self.right_sensor = self.light_intensity(self.right_eyes, lights)
+
+    def step(self, world, dt):
+        """Advance every vehicle by ``dt`` seconds, matching ``BraitenbergVehicle3.step``."""
+        frames = dt * FPS
+        self.sense(light_positions(world.lights))
+
+        # Crossed sensor-motor connection
+        left_wheel = self.right_sensor
+        right_wheel = self.left_sensor
+
+        random_wander = self.rng.uniform(-1.0, 1.0, size=len(self)) * self.wander_strength
+        self.turn_rate = (right_wheel - left_wheel) * self.turn_sensitivity
+        self.headings += (self.turn_rate + random_wander) * frames
+
+        self.speed = np.maximum(0.1, (left_wheel + right_wheel) / 2) * self.speed_multiplier
+        self.positions += self.forward() * (self.speed * frames)[:, None]
+
+        # Wrap screen
+        np.mod(self.positions, (world.width, world.height), out=self.positions)
+
+    def to_vehicles(self):
+        """Materialise the swarm as ``BraitenbergVehicle3`` objects, e.g. for drawing a few."""
+        vehicles = []
+        for i in range(len(self)):
+            vehicle = BraitenbergVehicle3(self.positions[i].tolist(), float(self.headings[i]))
+            vehicle.turn_sensitivity = self.turn_sensitivity[i]
+            vehicle.speed_multiplier = self.speed_multiplier[i]
+            vehicle.wander_strength = self.wander_strength[i]
+            vehicle.update_sensors()
+            vehicles.append(vehicle)
+        return vehicles
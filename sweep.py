@@ -0,0 +1,183 @@
+"""Parameter sweeps over vehicle tunables, run headless on a process pool.
+
+Every combination of the given values is run once per seed, in parallel
+across all cores, and scored on how long vehicles spend near lights, how
+often they hit obstacles and how much of the world they cover. Models with
+a collision memory (V6) also report its mean total strength:
+
+    python sweep.py V3 --param turn_sensitivity=4,8,12 --param wander_strength=0.4,1.2 --seeds 4
+    python sweep.py V4 --param VISION_RANGE=100,200,300 --steps 5000 --output v4.csv
+"""
+
+import argparse
+import csv
+import importlib
+import itertools
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+# Tunables per model: instance attributes set on every vehicle, or module constants
+PARAMETERS = {
+    "V3": {"turn_sensitivity": "vehicle", "speed_multiplier": "vehicle", "wander_strength": "vehicle"},
+    "V4": {"VISION_RANGE": "module", "OBSTACLE_THRESHOLD": "module", "REPULSION_STRENGTH": "module"},
+    "V6": {"COLLISION_DECAY": "module", "MEMORY_SHARING_DISTANCE": "module"},
+}
+NEAR_LIGHT = 60  # Distance that counts as "at a light"
+COVERAGE_CELL = 40
+METRICS = ("near_light", "collisions", "coverage", "memory")
+
+# Original module constants, captured per worker process on first use
+_defaults = {}
+
+
+class Metrics:
+    """Scores a world as it steps; call ``observe()`` after every ``world.step``."""
+
+    def __init__(self, world, near_light=NEAR_LIGHT, cell_size=COVERAGE_CELL):
+        self.world = world
+        self.near_light = near_light
+        self.cell_size = cell_size
+        self.visited = np.zeros((math.ceil(world.height / cell_size), math.ceil(world.width / cell_size)), dtype=bool)
+        self.touching = [False] * len(world.vehicles)
+        # Models that count their own collisions (V6) are scored on that count
+        self.counted = bool(world.vehicles) and hasattr(world.vehicles[0], "collision_count")
+        self.initial_collisions = self.collision_total()
+        self.near_steps = 0
+        self.collisions = 0
+        self.memory = 0.0
+        self.steps = 0
+
+    def collision_total(self):
+        return sum(vehicle.collision_count for vehicle in self.world.vehicles) if self.counted else 0
+
+    def observe(self):
+        world = self.world
+        positions = np.array([(v.position.x, v.position.y) for v in world.vehicles], dtype=np.float64).reshape(-1, 2)
+        if world.lights:
+            lights = np.array([(light.location.x, light.location.y) for light in world.lights], dtype=np.float64)
+            offset = positions[:, None, :] - lights[None, :, :]
+            nearest = np.einsum("nmk,nmk->nm", offset, offset).min(axis=1)
+            self.near_steps += int(np.count_nonzero(nearest <= self.near_light ** 2))
+
+        cells = np.floor_divide(positions, self.cell_size).astype(np.int64)
+        cells[:, 0] = np.clip(cells[:, 0], 0, self.visited.shape[1] - 1)
+        cells[:, 1] = np.clip(cells[:, 1], 0, self.visited.shape[0] - 1)
+        self.visited[cells[:, 1], cells[:, 0]] = True
+
+        if hasattr(world, "collision_map"):
+            self.memory += float(world.collision_map.total())
+
+        if self.counted:
+            self.collisions = self.collision_total() - self.initial_collisions
+            self.steps += 1
+            return
+
+        # Otherwise a collision is a vehicle's body coming into contact, counted once per contact
+        for i, vehicle in enumerate(world.vehicles):
+            radius = getattr(vehicle, "body_size", getattr(vehicle, "radius", 0))
+            touching = bool(world.obstacle_grid.within(vehicle.position, radius)) if len(world.obstacle_grid) else False
+            if touching and not self.touching[i]:
+                self.collisions += 1
+            self.touching[i] = touching
+        self.steps += 1
+
+    def result(self):
+        vehicle_steps = max(1, self.steps * len(self.world.vehicles))
+        result = {
+            "near_light": self.near_steps / vehicle_steps,
+            "collisions": self.collisions,
+            "coverage": float(self.visited.mean()),
+        }
+        if hasattr(self.world, "collision_map"):
+            result["memory"] = self.memory / max(1, self.steps)
+        return result
+
+
+def apply(module, world, params):
+    for name, value in params.items():
+        if PARAMETERS[module.__name__][name] == "module":
+            setattr(module, name, value)
+        else:
+            for vehicle in world.vehicles:
+                setattr(vehicle, name, value)
+
+
+def run_one(model, params, seed, steps):
+    """One headless run; returns the parameters, seed and metrics as a row."""
+    module = importlib.import_module(model)
+    # Pool workers are reused, so put module constants back before overriding them
+    defaults = _defaults.setdefault(model, {name: getattr(module, name) for name, kind in PARAMETERS[model].items()
+                                            if kind == "module"})
+    for name, value in defaults.items():
+        setattr(module, name, value)
+
+    world = module.create_world(seed)
+    apply(module, world, params)
+    metrics = Metrics(world)
+    dt = 1 / module.FPS
+    for _ in range(steps):
+        world.step(dt)
+        metrics.observe()
+    return {"model": model, "seed": seed, **params, **metrics.result()}
+
+
+def grid(params):
+    """Every combination of ``{name: [values]}`` as a list of dicts."""
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*(params[name] for name in names))]
+
+
+def sweep(model, params, seeds=(0,), steps=3000, workers=None):
+    """Run every combination for every seed across ``workers`` processes (default: all cores)."""
+    jobs = [(model, combo, seed, steps) for combo in grid(params) for seed in seeds]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_one, *zip(*jobs)))
+
+
+def parse_param(text):
+    name, _, values = text.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2,..., got {text!r}")
+    return name, [float(value) if "." in value or "e" in value else int(value) for value in values.split(",")]
+
+
+def write_table(rows, f):
+    columns = list(rows[0]) if rows else []
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([f"{row[c]:.6g}" if isinstance(row[c], float) else row[c] for c in columns])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("model", choices=sorted(PARAMETERS))
+    parser.add_argument("--param", action="append", type=parse_param, default=[], metavar="NAME=V1,V2,...")
+    parser.add_argument("--seeds", type=int, default=1, help="runs per combination, seeded 0..N-1")
+    parser.add_argument("--steps", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--output", help="CSV file to write (default: stdout)")
+    args = parser.parse_args(argv)
+
+    params = dict(args.param)
+    unknown = set(params) - set(PARAMETERS[args.model])
+    if unknown:
+        parser.error(f"{args.model} has no tunable {', '.join(sorted(unknown))}; "
+                     f"choose from {', '.join(PARAMETERS[args.model])}")
+
+    rows = sweep(args.model, params, seeds=range(args.seeds), steps=args.steps, workers=args.workers)
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write_table(rows, f)
+    else:
+        write_table(rows, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Live vehicle telemetry streamed to local TCP clients as newline-delimited JSON.
+
+A ``TelemetryServer`` runs an asyncio server on its own thread. The
+simulation calls ``publish(world, step)``; each connected client first gets
+a ``hello`` line naming the model and the vehicle ``fields``, then one
+``step`` line per published step:
+
+    {"type":"step","step":120,"time":2.0,"vehicles":[[x,y,heading,...],...],
+     "counters":{"vehicles":4,"lights":3,"obstacles":6,"collisions":2,"memory":1.9}}
+
+Publishing never waits on a client. Every client has a short queue; when
+a slow client's queue is full its oldest frame is dropped (the gap shows
+in ``step``) and the simulation carries on.
+
+    python telemetry.py serve V6 --steps 1000000 --every 10
+    python telemetry.py watch
+    nc localhost 8765
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from recording import FIELDS
+
+HOST = "127.0.0.1"  # Local clients only
+PORT = 8765
+QUEUE_FRAMES = 4  # Frames buffered per client before the oldest are dropped
+WRITE_BUFFER = 64 * 1024  # Bytes the socket may hold before a client counts as slow
+
+
+def counters(world):
+    """Aggregate counters: entity counts, plus collisions and memory where the model keeps them."""
+    result = {"vehicles": len(world.vehicles), "lights": len(world.lights), "obstacles": len(world.obstacles)}
+    if world.vehicles and hasattr(world.vehicles[0], "collision_count"):
+        result["collisions"] = sum(vehicle.collision_count for vehicle in world.vehicles)
+    if hasattr(world, "collision_map"):
+        result["memory"] = round(world.collision_map.total(), 4)
+    return result
+
+
+def step_message(world, step):
+    states = np.array([vehicle.state() for vehicle in world.vehicles], dtype=np.float64).reshape(-1, len(FIELDS))
+    return {"type": "step", "step": step, "time": round(world.time, 6),
+            "vehicles": np.round(states, 4).tolist(), "counters": counters(world)}
+
+
+def encode(message):
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class Client:
+    def __init__(self, writer, queue_frames):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_frames)
+        self.dropped = 0
+
+
+class TelemetryServer:
+    """Fans encoded frames out to every connected client from a background event loop.
+
+    ``start()`` binds ``host``:``port`` (port 0 picks a free one, read back
+    from ``port``) and returns once the server is listening. ``hello`` is
+    merged into the first line each client receives. ``dropped`` counts
+    frames dropped across all clients.
+    """
+
+    def __init__(self, host=HOST, port=PORT, queue_frames=QUEUE_FRAMES, hello=None):
+        self.host = host
+        self.port = port
+        self.queue_frames = queue_frames
+        self.hello = encode({"type": "hello", "fields": FIELDS, **(hello or {})})
+        self.clients = set()
+        self.dropped = 0
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self.ready = threading.Event()
+        self.server = None
+        self.error = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(self._serve, self.host, self.port))
+        except OSError as error:
+            self.error = error
+            self.ready.set()
+            return
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+
+        # Stopped by close()
+        self.server.close()
+        for client in list(self.clients):
+            client.writer.close()
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.close()
+
+    async def _serve(self, reader, writer):
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER)
+        client = Client(writer, self.queue_frames)
+        self.clients.add(client)
+        try:
+            writer.write(self.hello)
+            while True:
+                writer.write(await client.queue.get())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # Client went away, or the server is closing
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    def _fan_out(self, data):
+        for client in self.clients:
+            if client.queue.full():
+                client.queue.get_nowait()
+                client.dropped += 1
+                self.dropped += 1
+            client.queue.put_nowait(data)
+
+    def publish(self, world, step):
+        """Queue ``world``'s state for every client; returns straight away, False if nobody listens."""
+        if not self.clients:
+            return False
+        self.loop.call_soon_threadsafe(self._fan_out, encode(step_message(world, step)))
+        return True
+
+    def close(self):
+        if self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+
+
+def serve(model, steps, seed=None, host=HOST, port=PORT, every=1, realtime=False):
+    """Run ``model`` headless for ``steps`` steps, publishing every ``every``-th step."""
+    module = importlib.import_module(model)
+    world = module.create_world(seed)
+    dt = 1 / module.FPS
+    hello = {"model": model, "seed": seed, "dt": dt, "every": every, "width": world.width, "height": world.height}
+    with TelemetryServer(host, port, hello=hello) as server:
+        print(f"Streaming {model} telemetry on {server.host}:{server.port}", flush=True)
+        start = time.perf_counter()
+        for step in range(1, steps + 1):
+            world.step(dt)
+            if step % every == 0:
+                server.publish(world, step)
+            if realtime:
+                time.sleep(max(0.0, start + step * dt - time.perf_counter()))
+        print(f"{steps} steps in {time.perf_counter() - start:.1f}s, {server.dropped} frames dropped for slow clients")
+
+
+async def watch(host=HOST, port=PORT, delay=0.0):
+    """Print a line per frame received; ``delay`` seconds per frame plays a slow client."""
+    reader, writer = await asyncio.open_connection(host, port)
+    last = None
+    every = 1
+    try:
+        while line := await reader.readline():
+            message = json.loads(line)
+            if message["type"] == "hello":
+                print(f"{message.get('model', '?')}: {', '.join(message['fields'])}")
+                every = message.get("every", 1)
+                continue
+            step = message["step"]
+            missed = (step - last) // every - 1 if last is not None else 0
+            counts = " ".join(f"{name}={value}" for name, value in message["counters"].items())
+            print(f"step {step} t={message['time']:.2f}s {counts}" + (f" ({missed} frames dropped)" if missed > 0 else ""))
+            last = step
+            if delay:
+                await asyncio.sleep(delay)
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("serve", help="run a model headless and stream its telemetry")
+    run.add_argument("model", choices=("V1", "V2", "V3", "V4", "V6"))
+    run.add_argument("--steps", type=int, default=1_000_000)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--every", type=int, default=1, help="publish every Nth step")
+    run.add_argument("--realtime", action="store_true", help="step at the model's FPS instead of flat out")
+    run.add_argument("--host", default=HOST)
+    run.add_argument("--port", type=int, default=PORT)
+    view = commands.add_parser("watch", help="print a running server's frames")
+    view.add_argument("--host", default=HOST)
+    view.add_argument("--port", type=int, default=PORT)
+    view.add_argument("--delay", type=float, default=0.0, help="seconds to sleep per frame, to test a slow client")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        serve(args.model, args.steps, args.seed, args.host, args.port, args.every, args.realtime)
+    else:
+        try:
+            asyncio.run(watch(args.host, args.port, args.delay))
+        except (ConnectionError, KeyboardInterrupt):
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The vehicle scripts are top-level modules, and nothing here opens a window
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
@@ -0,0 +1,54 @@
+import numpy as np
+
+from collision_memory import CollisionMemory, SharedCollisionMemory
+
+
+def eager_steps(rng, steps, shape):
+    """Random writes and decays, applied to a plain array straight away."""
+    eager = np.zeros(shape)
+    ops = []
+    for _ in range(steps):
+        x, y = rng.integers(shape[1]), rng.integers(shape[0])
+        amount = rng.uniform(0.5, 3)
+        factor = rng.uniform(0.5, 0.999)
+        eager[y, x] = min(10.0, eager[y, x] + amount)
+        eager *= factor
+        ops.append((x, y, amount, factor))
+    return eager, ops
+
+
+def test_lazy_decay_matches_eager_decay():
+    rng = np.random.default_rng(0)
+    eager, ops = eager_steps(rng, 2000, (12, 15))
+    memory = CollisionMemory(15, 12, 40)
+    for x, y, amount, factor in ops:
+        memory.add(x, y, amount, limit=10.0)
+        memory.decay(factor)
+    # 2000 decays of at most 0.999 drive the scale through renormalisation many times
+    assert np.allclose(memory.values(), eager, rtol=1e-4, atol=1e-30)
+    assert np.isclose(memory.total(), eager.sum(), rtol=1e-4)
+
+
+def test_scatter_and_gather_track_the_total():
+    memory = CollisionMemory(4, 3, 10)
+    memory.decay(0.25)
+    memory.scatter(np.array([0, 5, 11]), [1.0, 2.0, 3.0])
+    assert np.allclose(memory.gather(np.array([11, 5, 0])), [3.0, 2.0, 1.0])
+    assert np.isclose(memory.total(), 6.0)
+    memory.decay(0.5)
+    assert np.isclose(memory.total(), 3.0)
+    assert memory.value_at((15, 15)) == memory.get(1, 1) == 1.0
+
+
+def test_shared_memory_is_one_map_for_every_attachment():
+    memory = SharedCollisionMemory.create(6, 4, 40)
+    try:
+        reader = SharedCollisionMemory.attach(memory.name, readonly=True)
+        memory.add(2, 1, 4.0)
+        memory.decay(0.5)
+        assert reader.get(2, 1) == 2.0
+        assert reader.total() == memory.total() == 2.0
+        assert not reader.stored.flags.writeable
+        reader.close()
+    finally:
+        memory.close()
@@ -0,0 +1,56 @@
+import numpy as np
+import pygame
+
+import response
+from light_field import LightField
+
+CURVE = response.power(300, 1.5)
+
+
+class Light:
+    def __init__(self, x, y):
+        self.location = pygame.Vector2(x, y)
+
+
+def field(**kwargs):
+    return LightField(800, 600, CURVE.many, reach=CURVE.reach, **kwargs)
+
+
+def test_incremental_sync_matches_a_full_rebuild():
+    rng = np.random.default_rng(0)
+    lights = [Light(*rng.uniform((0, 0), (800, 600))) for _ in range(6)]
+    incremental = field()
+    incremental.sync(lights)
+    for _ in range(40):
+        # Drag one light, sometimes add or drop one, syncing after each edit
+        rng.choice(lights).location += pygame.Vector2(*rng.uniform(-50, 50, size=2))
+        if rng.random() < 0.2:
+            lights.append(Light(*rng.uniform((0, 0), (800, 600))))
+        elif rng.random() < 0.2 and len(lights) > 2:
+            lights.pop(int(rng.integers(len(lights))))
+        incremental.sync(lights)
+    rebuilt = field()
+    rebuilt.build(lights)
+    assert np.allclose(incremental.values, rebuilt.values, atol=1e-9)
+
+
+def test_field_samples_close_to_exact_intensity():
+    lights = [Light(200, 150), Light(520, 400)]
+    sampled = field()
+    sampled.sync(lights)
+    points = np.random.default_rng(1).uniform((0, 0), (800, 600), size=(500, 2))
+    exact = sum(CURVE.many(((points - (light.location.x, light.location.y)) ** 2).sum(axis=1)) for light in lights)
+    assert np.abs(sampled.sample_many(points) - exact).max() < 0.01
+    assert sampled.sample(points[0]) == sampled.sample_many(points[:1])[0]
+
+
+def test_region_samples_match_the_whole_field_exactly():
+    lights = [Light(100, 100), Light(450, 320), Light(790, 590)]
+    whole = field()
+    whole.sync(lights)
+    part = field(region=(300, 200, 700, 500))
+    part.sync(lights)
+    assert part.values.size < whole.values.size / 2
+    points = np.random.default_rng(2).uniform((300, 200), (700, 500), size=(500, 2))
+    assert np.array_equal(part.sample_many(points), whole.sample_many(points))
+    assert all(part.sample(point) == whole.sample(point) for point in points[:50])
@@ -0,0 +1,87 @@
+import math
+import random
+
+import numpy as np
+import pygame
+
+from raycast import batch_raycast, ray_directions, rect_array
+
+
+def per_ray_raycast(start, end, obstacles):
+    """V6's original one-ray, one-rect-at-a-time raycast, kept as the reference."""
+    direction = end - start
+    max_distance = direction.length()
+    direction.normalize_ip()
+    closest_t = float("inf")
+    collision_point = normal = None
+    for obs in obstacles:
+        t_near = pygame.Vector2((obs.left - start.x) / direction.x if direction.x != 0 else float("-inf"),
+                                (obs.top - start.y) / direction.y if direction.y != 0 else float("-inf"))
+        t_far = pygame.Vector2((obs.right - start.x) / direction.x if direction.x != 0 else float("inf"),
+                               (obs.bottom - start.y) / direction.y if direction.y != 0 else float("inf"))
+        if t_near.x > t_far.x:
+            t_near.x, t_far.x = t_far.x, t_near.x
+        if t_near.y > t_far.y:
+            t_near.y, t_far.y = t_far.y, t_near.y
+        t_min = max(t_near.x, t_near.y)
+        t_max = min(t_far.x, t_far.y)
+        if t_min < t_max and 0 < t_min < max_distance and t_min < closest_t:
+            closest_t = t_min
+            collision_point = start + direction * t_min
+            if t_min == t_near.x:
+                normal = pygame.Vector2(-1, 0) if direction.x > 0 else pygame.Vector2(1, 0)
+            else:
+                normal = pygame.Vector2(0, -1) if direction.y > 0 else pygame.Vector2(0, 1)
+    return collision_point, normal
+
+
+def random_scene(seed, rects=40, origins=30):
+    rng = random.Random(seed)
+    obstacles = [pygame.Rect(rng.randint(0, 900), rng.randint(0, 700), rng.randint(10, 150), rng.randint(10, 150))
+                 for _ in range(rects)]
+    points = [(rng.uniform(0, 1000), rng.uniform(0, 800)) for _ in range(origins)]
+    return obstacles, points
+
+
+def test_batch_matches_per_ray_raycast():
+    obstacles, origins = random_scene(0)
+    # Off-axis angles: the old loop treated axis-parallel rays as inside every slab
+    angles = [7.5 + 45 * i for i in range(8)]
+    directions = ray_directions(angles)
+    distances, points, normals = batch_raycast(origins, directions, 100, rect_array(obstacles))
+    for i, origin in enumerate(origins):
+        for j, angle in enumerate(angles):
+            start = pygame.Vector2(origin)
+            end = start + pygame.Vector2(0, -1).rotate(angle) * 100
+            point, normal = per_ray_raycast(start, end, obstacles)
+            if point is None:
+                assert math.isinf(distances[i, j])
+                assert np.isnan(points[i, j]).all()
+            else:
+                assert np.allclose(points[i, j], (point.x, point.y))
+                assert tuple(normals[i, j]) == (normal.x, normal.y)
+
+
+def test_per_origin_rects_match_shared_rects():
+    obstacles, origins = random_scene(1)
+    boxes = rect_array(obstacles)
+    directions = ray_directions(range(0, 360, 45))
+    shared = batch_raycast(origins, directions, 100, boxes)
+
+    # Each origin gets its own shuffled subset of the rects it can reach, padded with boxes at infinity
+    padded = np.full((len(origins), len(boxes), 4), np.inf)
+    rng = np.random.default_rng(0)
+    for i, (x, y) in enumerate(origins):
+        near = np.flatnonzero((boxes[:, 0] <= x + 100) & (boxes[:, 2] >= x - 100)
+                              & (boxes[:, 1] <= y + 100) & (boxes[:, 3] >= y - 100))
+        padded[i, :len(near)] = boxes[rng.permutation(near)]
+    per_origin = batch_raycast(origins, directions, 100, padded)
+    for expected, actual in zip(shared, per_origin):
+        assert np.array_equal(expected, actual, equal_nan=True)
+
+
+def test_axis_parallel_ray_only_hits_rects_in_its_slab():
+    boxes = rect_array([pygame.Rect(50, -20, 10, 40), pygame.Rect(50, 30, 10, 40)])
+    distances, points, normals = batch_raycast([(0, 0)], ray_directions([90]), 100, boxes)
+    assert distances[0, 0] == 50
+    assert tuple(normals[0, 0]) == (-1, 0)
@@ -0,0 +1,43 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import V6
+import sharding
+
+
+def single_process(seed, scale, steps):
+    world = V6.create_world(seed, scale=scale)
+    for _ in range(steps):
+        world.step(1 / V6.FPS)
+    return np.array([bot.state() for bot in world.vehicles])
+
+
+@pytest.mark.parametrize("tiles", [(1, 1), (2, 1), (2, 2)])
+def test_sharded_world_matches_one_process(tiles):
+    with sharding.ShardedWorld(tiles, seed=0, scale=2) as sharded:
+        counts = sharded.step(60)
+        states = sharded.states()
+    assert sum(counts) == len(states)
+    assert np.array_equal(states, single_process(0, 2, 60))
+
+
+def test_layout_assigns_every_cell_to_one_tile():
+    layout = sharding.Layout(3000, 2400, 3, 2)
+    owned = np.zeros((2400 // layout.cell_size, 3000 // layout.cell_size), dtype=int)
+    for index in range(len(layout)):
+        col0, row0, col1, row1 = layout.cells(index)
+        owned[row0:row1, col0:col1] += 1
+    assert (owned == 1).all()
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers must inherit the patched step")
+def test_worker_failure_is_raised_in_the_parent(monkeypatch):
+    def fail(self, dt):
+        raise ValueError("boom")
+
+    monkeypatch.setattr(sharding.Tile, "step", fail)
+    with pytest.raises(RuntimeError, match="boom"):
+        with sharding.ShardedWorld((2, 1), seed=0, scale=1) as sharded:
+            sharded.step(1)
@@ -0,0 +1,84 @@
+import math
+import random
+
+import numpy as np
+import pygame
+
+from spatial import NeighborGrid, ObstacleGrid
+
+
+class Circle:
+    def __init__(self, position, radius):
+        self.position = pygame.Vector2(position)
+        self.radius = radius
+
+
+def obstacles(seed, count=200):
+    rng = random.Random(seed)
+    found = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            found.append(pygame.Rect(rng.randint(-100, 1900), rng.randint(-100, 1400), rng.randint(5, 200), rng.randint(5, 200)))
+        else:
+            found.append(Circle((rng.uniform(-100, 2000), rng.uniform(-100, 1500)), rng.uniform(3, 80)))
+    return found
+
+
+def overlaps(grid, i, left, top, right, bottom):
+    box_left, box_top, box_right, box_bottom = grid.boxes[i]
+    return box_left <= right and box_right >= left and box_top <= bottom and box_bottom >= top
+
+
+def test_candidates_cover_every_overlapping_obstacle():
+    grid = ObstacleGrid(obstacles(0))
+    rng = random.Random(1)
+    for _ in range(200):
+        x, y, r = rng.uniform(-200, 2100), rng.uniform(-200, 1600), rng.uniform(1, 150)
+        found = grid.candidates(x - r, y - r, x + r, y + r)
+        assert found == sorted(found)
+        expected = [i for i in range(len(grid)) if overlaps(grid, i, x - r, y - r, x + r, y + r)]
+        assert set(expected) <= set(found)
+
+
+def test_candidates_around_matches_candidates_per_point():
+    grid = ObstacleGrid(obstacles(2))
+    rng = np.random.default_rng(3)
+    points = rng.uniform((-200, -200), (2100, 1600), size=(300, 2))
+    rows = grid.candidates_around(points, 100)
+    for (x, y), row in zip(points, rows):
+        assert list(row[row < len(grid)]) == grid.candidates(x - 100, y - 100, x + 100, y + 100)
+
+
+def test_within_and_at_point_match_brute_force():
+    items = obstacles(4)
+    grid = ObstacleGrid(items)
+    rng = random.Random(5)
+    for _ in range(300):
+        point = (rng.uniform(-150, 2050), rng.uniform(-150, 1550))
+        radius = rng.uniform(0, 60)
+        near, inside = [], []
+        for obs in items:
+            if isinstance(obs, Circle):
+                gap = math.hypot(point[0] - obs.position.x, point[1] - obs.position.y) - obs.radius
+                contains = gap < 0
+            else:
+                gap = math.hypot(max(obs.left - point[0], 0, point[0] - obs.right),
+                                 max(obs.top - point[1], 0, point[1] - obs.bottom))
+                contains = obs.collidepoint(point)
+            if gap <= radius:
+                near.append(obs)
+            if contains:
+                inside.append(obs)
+        assert grid.within(point, radius) == near
+        assert grid.at_point(point) == inside
+
+
+def test_neighbor_pairs_match_brute_force():
+    rng = np.random.default_rng(6)
+    points = rng.uniform(0, 1000, size=(400, 2))
+    rows, cols = NeighborGrid(points, 60).pairs()
+    offset = points[:, None, :] - points[None, :, :]
+    close = (np.einsum("ijk,ijk->ij", offset, offset) < 60 ** 2) & ~np.eye(len(points), dtype=bool)
+    expected_rows, expected_cols = np.nonzero(close)
+    assert np.array_equal(rows, expected_rows)
+    assert np.array_equal(cols, expected_cols)
@@ -0,0 +1,22 @@
+import V6
+import sweep
+
+
+def test_v6_collisions_come_from_the_vehicles_own_count():
+    row = sweep.run_one("V6", {}, seed=0, steps=300)
+    world = V6.create_world(0)
+    for _ in range(300):
+        world.step(1 / V6.FPS)
+    assert row["collisions"] == sum(vehicle.collision_count for vehicle in world.vehicles)
+
+
+def test_v6_memory_metric_tells_decay_rates_apart():
+    fast = sweep.run_one("V6", {"COLLISION_DECAY": 0.5}, seed=0, steps=300)
+    slow = sweep.run_one("V6", {"COLLISION_DECAY": 0.999}, seed=0, steps=300)
+    assert slow["memory"] > fast["memory"] * 10
+
+
+def test_v3_rows_have_no_memory_column():
+    row = sweep.run_one("V3", {"turn_sensitivity": 4}, seed=0, steps=50)
+    assert "memory" not in row
+    assert set(row) >= {"near_light", "collisions", "coverage"}
@@ -0,0 +1,25 @@
+import numpy as np
+
+from trails import TrailBuffer
+
+
+def test_ring_buffer_keeps_the_newest_points_in_order():
+    trail = TrailBuffer(5)
+    for i in range(13):
+        trail.append((i, -i))
+        expected = np.array([(j, -j) for j in range(max(0, i - 4), i + 1)], dtype=np.float64)
+        assert len(trail) == len(expected)
+        assert np.array_equal(trail.ordered(), expected)
+        assert np.array_equal(trail.last(3), expected[-3:])
+
+
+def test_last_is_clamped_and_clear_empties():
+    trail = TrailBuffer(4)
+    for i in range(6):
+        trail.append((i, i))
+    assert np.array_equal(trail.last(10), trail.ordered())
+    trail.clear()
+    assert len(trail) == 0
+    assert trail.ordered().shape == (0, 2)
+    trail.append((7, 8))
+    assert np.array_equal(trail.ordered(), [(7, 8)])
@@ -0,0 +1,103 @@
+"""Fixed-size trail history and a fading surface that trails are drawn into."""
+
+import numpy as np
+import pygame
+
+
+class TrailBuffer:
+    """The last ``capacity`` positions of a vehicle in a NumPy ring buffer.
+
+    ``append`` overwrites the oldest point in place, so keeping a long trail
+    costs the same per step as a short one.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = np.empty((capacity, 2), dtype=np.float64)
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, point):
+        index = (self.start + self.count) % self.capacity
+        self.data[index] = point[0], point[1]
+        if self.count < self.capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def last(self, n):
+        """The newest ``n`` points (fewer if the trail is shorter), oldest first."""
+        n = min(n, self.count)
+        indices = (self.start + self.count - n + np.arange(n)) % self.capacity
+        return self.data[indices]
+
+    def ordered(self):
+        """Every point, oldest first, as a (len, 2) array."""
+        end = self.start + self.count
+        if end <= self.capacity:
+            return self.data[self.start:end]
+        return np.concatenate((self.data[self.start:], self.data[:end - self.capacity]))
+
+
+class TrailLayer:
+    """Alpha surface that keeps trails between frames and fades them out.
+
+    ``extend()`` draws only the newest segment of each trail, so nothing is
+    rebuilt however long the trails get. ``fade()`` lowers every pixel's
+    alpha in ``levels`` steps spread over ``lifetime`` frames; a whole-surface
+    pass is a few milliseconds, so it runs every few frames rather than every
+    frame. Segments longer than ``max_jump`` (a vehicle wrapping around the
+    screen) are skipped.
+    """
+
+    def __init__(self, size, lifetime=100, alpha=255, levels=16, max_jump=None):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.alpha = alpha
+        self.levels = levels
+        self.max_jump = min(size) / 2 if max_jump is None else max_jump
+        self.set_lifetime(lifetime)
+        self.frame = 0
+        self.clear()
+
+    def set_lifetime(self, lifetime):
+        """Fade a fresh segment out over about ``lifetime`` frames."""
+        self.fade_amount = max(1, -(-self.alpha // min(self.levels, lifetime)))
+        self.fade_every = max(1, round(lifetime * self.fade_amount / self.alpha))
+
+    def clear(self):
+        self.surface.fill((0, 0, 0, 0))
+
+    def fade(self):
+        self.frame += 1
+        if self.frame % self.fade_every == 0:
+            alpha = pygame.surfarray.pixels_alpha(self.surface)
+            np.subtract(alpha, np.minimum(alpha, self.fade_amount), out=alpha)
+            del alpha  # Unlock the surface before it is blitted
+
+    def segment(self, color, start, end, width=1):
+        """Draw one segment at full alpha; returns its rect, or None if skipped."""
+        if abs(end[0] - start[0]) > self.max_jump or abs(end[1] - start[1]) > self.max_jump:
+            return None
+        return pygame.draw.line(self.surface, tuple(color[:3]) + (self.alpha,), start, end, width)
+
+    def extend(self, trail, color, width=1, segments=1):
+        """Draw the ``segments`` newest segments of a ``TrailBuffer``, i.e. those its last appends added."""
+        points = trail.last(segments + 1)
+        for start, end in zip(points[:-1], points[1:]):
+            self.segment(color, start, end, width)
+
+    def redraw(self, trail, color, width=1):
+        """Draw a whole ``TrailBuffer`` at once, e.g. after ``clear()``."""
+        points = trail.ordered()
+        for start, end in zip(points[:-1], points[1:]):
+            self.segment(color, start, end, width)
+
+    def draw(self, surface):
+        surface.blit(self.surface, (0, 0))
@@ -0,0 +1,91 @@
+"""Display-free simulation state shared by the vehicle scripts.
+
+Nothing in here touches ``pygame.display``, so a world can be built and
+stepped in a batch job without ever opening a window.
+"""
+
+import random
+
+from spatial import ObstacleGrid
+
+
+def spawn_rng(rng):
+    """An independent ``random.Random`` seeded from ``rng``.
+
+    Each vehicle draws from its own generator, so adding, removing or
+    reordering vehicles never shifts the random stream of the others.
+    """
+    return random.Random(rng.getrandbits(64))
+
+
+class World:
+    """Everything a vehicle can sense while it steps.
+
+    ``lights`` are objects with a ``location``; ``obstacles`` are whatever
+    the model collides with (circles in V1/V4, ``pygame.Rect`` in V6).
+    ``time`` is the simulation clock in seconds, advanced only by ``step``,
+    and ``rng`` seeds vehicles spawned after the world was built. With a
+    ``light_field`` (a ``light_field.LightField``) vehicles sample summed
+    light intensity from it instead of visiting every light.
+    """
+
+    def __init__(self, width, height, lights=(), obstacles=(), vehicles=(), rng=None, light_field=None):
+        self.width = width
+        self.height = height
+        self.lights = list(lights)
+        self.vehicles = list(vehicles)
+        self.time = 0.0
+        self.rng = rng if rng is not None else random.Random()
+        self.light_field = light_field
+        self.set_obstacles(obstacles)
+
+    def set_obstacles(self, obstacles):
+        """Replace the obstacles and rebuild their spatial index."""
+        self.obstacles = list(obstacles)
+        self.obstacle_grid = ObstacleGrid(self.obstacles)
+
+    def wrap(self, position):
+        """Wrap a ``pygame.Vector2`` around the world edges in place."""
+        position.x %= self.width
+        position.y %= self.height
+
+    def step(self, dt):
+        """Advance every vehicle by ``dt`` seconds."""
+        if self.light_field is not None:
+            self.light_field.sync(self.lights)
+        for vehicle in self.vehicles:
+            vehicle.step(self, dt)
+        self.time += dt
+
+
+class FixedTimestep:
+    """Steps a world at a fixed ``dt`` whatever rate frames are drawn at.
+
+    Elapsed wall time is banked in an accumulator and spent in whole steps,
+    so a run is the same sequence of ``world.step(dt)`` calls on a fast or
+    a slow machine. At most ``max_steps`` run per frame; anything beyond
+    that is dropped rather than letting a slow frame snowball.
+    """
+
+    def __init__(self, world, dt, max_steps=5):
+        self.world = world
+        self.dt = dt
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, elapsed):
+        """Bank ``elapsed`` seconds and run the steps they pay for; returns how many ran."""
+        self.accumulator += elapsed
+        steps = 0
+        while self.accumulator >= self.dt and steps < self.max_steps:
+            self.world.step(self.dt)
+            self.accumulator -= self.dt
+            steps += 1
+        if steps == self.max_steps:
+            self.accumulator = min(self.accumulator, self.dt)
+        return steps
+
+    @property
+    def alpha(self):
+        """How far into the next step the accumulator is (0 to 1), for interpolation."""
+        return self.accumulator / self.dt